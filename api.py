@@ -0,0 +1,312 @@
+"""
+Headless JSON API for recipe search
+
+Serves the same engine as app.py (the utils package) to clients other
+than the Streamlit UI. It is a plain ASGI application, so any ASGI server
+can run it. Every worker process loads the recipe index and substitutes
+once at startup and keeps them warm, reloading them in the background when
+the data files change (see utils.reloader); blocking work runs on thread
+pools, AI generation on its own, so slow AI requests don't hold up searches.
+
+Usage:
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+    python api.py --port 8000 --workers 4
+
+Endpoints:
+    GET  /health          Liveness, number of recipes loaded, data version and AI call limits
+    GET  /metrics         Prometheus metrics (?format=json for JSON)
+    POST /search          {"ingredients": [...], "dietary_filter": "veg", "limit": 10,
+                           "use_substitutes": false, "fuzzy": true, ...}
+    POST /search/batch    {"pantries": [[...], [...]], ...options shared by every pantry}
+    POST /substitutes     {"ingredients": [...]}
+    POST /ai/recipes      {"ingredients": [...], "dietary_filter": null, "num_recipes": 2}
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from utils import metrics
+from utils.ai_helper import ai_limits_status, generate_ai_recipes
+from utils.reloader import HOT_RELOAD_ENABLED, get_watcher, start_watcher
+from utils.matcher import (
+    MATCH_BACKENDS,
+    PRELOAD_BACKENDS,
+    find_matching_recipes,
+    find_matching_recipes_batch,
+    get_recipe_index,
+    get_substitutes_for_ingredients,
+    warm_up
+)
+
+logger = logging.getLogger(__name__)
+
+# Request limits
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_SIZE = 256
+# Recipes per pantry: returned when the request sets no 'limit', and the most it may ask for
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_AI_RECIPES = 5
+
+DEFAULT_WORKERS = int(os.getenv('DISHGPT_API_WORKERS', '1'))
+
+# Threads per worker process for AI requests; everything else runs on the
+# event loop's default pool
+AI_THREADS = 8
+
+
+class APIError(Exception):
+    """Request error reported to the client with an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _ingredients(payload, field='ingredients'):
+    """An ingredient list from the request; a comma-separated string is split"""
+    value = payload.get(field)
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return value
+    raise APIError(400, f"'{field}' must be a list of strings or a comma-separated string")
+
+
+def _search_options(payload):
+    """Validated find_matching_recipes keyword arguments from the request"""
+    options = {}
+
+    dietary_filter = payload.get('dietary_filter')
+    if dietary_filter not in (None, 'veg', 'non-veg'):
+        raise APIError(400, "'dietary_filter' must be 'veg', 'non-veg' or null")
+    options['dietary_filter'] = dietary_filter
+
+    min_score = payload.get('min_score', 0)
+    if isinstance(min_score, bool) or not isinstance(min_score, (int, float)):
+        raise APIError(400, "'min_score' must be a number")
+    options['min_score'] = min_score
+
+    limit = payload.get('limit', DEFAULT_LIMIT)
+    if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= MAX_LIMIT:
+        raise APIError(400, f"'limit' must be an integer from 1 to {MAX_LIMIT}")
+    options['limit'] = limit
+
+    can_make_now_only = payload.get('can_make_now_only', False)
+    if not isinstance(can_make_now_only, bool):
+        raise APIError(400, "'can_make_now_only' must be a boolean")
+    options['can_make_now_only'] = can_make_now_only
+
+    backend = payload.get('backend', 'python')
+    if backend not in MATCH_BACKENDS:
+        raise APIError(400, f"'backend' must be one of {', '.join(MATCH_BACKENDS)}")
+    options['backend'] = backend
+
+    use_substitutes = payload.get('use_substitutes', False)
+    if not isinstance(use_substitutes, bool):
+        raise APIError(400, "'use_substitutes' must be a boolean")
+    if use_substitutes and backend == 'sql':
+        raise APIError(400, "'use_substitutes' is not supported by the 'sql' backend")
+    options['use_substitutes'] = use_substitutes
+
+    fuzzy = payload.get('fuzzy', True)
+    if not isinstance(fuzzy, bool):
+        raise APIError(400, "'fuzzy' must be a boolean")
+    options['fuzzy'] = fuzzy
+
+    return options
+
+
+def health(payload, query):
+    watcher = get_watcher()
+    return {
+        'status': 'ok',
+        'recipes': len(get_recipe_index()),
+        'data': watcher.status() if watcher is not None else None,
+        'ai': ai_limits_status()
+    }
+
+
+def metrics_export(payload, query):
+    if query.get('format') == ['json']:
+        return metrics.registry.snapshot()
+    return metrics.registry.export_prometheus()
+
+
+def search(payload, query):
+    ingredients = _ingredients(payload)
+    recipes = find_matching_recipes(ingredients, **_search_options(payload))
+    return {'count': len(recipes), 'recipes': recipes}
+
+
+def search_batch(payload, query):
+    pantries = payload.get('pantries')
+    if not isinstance(pantries, list):
+        raise APIError(400, "'pantries' must be a list of ingredient lists")
+    if len(pantries) > MAX_BATCH_SIZE:
+        raise APIError(400, f"At most {MAX_BATCH_SIZE} pantries per batch")
+
+    pantries = [_ingredients({'pantry': pantry}, 'pantry') for pantry in pantries]
+    options = _search_options(payload)
+
+    return {
+        'results': [
+            {'count': len(recipes), 'recipes': recipes}
+            for recipes in find_matching_recipes_batch(pantries, **options)
+        ]
+    }
+
+
+def substitutes(payload, query):
+    return {'substitutes': get_substitutes_for_ingredients(_ingredients(payload))}
+
+
+def ai_recipes(payload, query):
+    ingredients = _ingredients(payload)
+
+    num_recipes = payload.get('num_recipes', 2)
+    if isinstance(num_recipes, bool) or not isinstance(num_recipes, int) or not 1 <= num_recipes <= MAX_AI_RECIPES:
+        raise APIError(400, f"'num_recipes' must be an integer from 1 to {MAX_AI_RECIPES}")
+
+    dietary_filter = _search_options({'dietary_filter': payload.get('dietary_filter')})['dietary_filter']
+
+    recipes = generate_ai_recipes(ingredients, dietary_filter, num_recipes)
+    return {'count': len(recipes), 'recipes': recipes}
+
+
+# (method, path) -> handler(payload, query) returning a dict (JSON) or str (text)
+ROUTES = {
+    ('GET', '/health'): health,
+    ('GET', '/metrics'): metrics_export,
+    ('POST', '/search'): search,
+    ('POST', '/search/batch'): search_batch,
+    ('POST', '/substitutes'): substitutes,
+    ('POST', '/ai/recipes'): ai_recipes
+}
+
+
+# Handlers that wait on the model, run on _ai_executor
+AI_HANDLERS = {ai_recipes}
+
+_ai_executor = ThreadPoolExecutor(max_workers=AI_THREADS, thread_name_prefix='dishgpt-api-ai')
+
+
+def warm():
+    """Load the recipe index and substitutes before the first request"""
+    for backend in PRELOAD_BACKENDS:
+        logger.info("Warmed up the %s backend: %d recipes", backend, warm_up(backend))
+    if HOT_RELOAD_ENABLED:
+        start_watcher()
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise APIError(413, f"Request body larger than {MAX_BODY_BYTES} bytes")
+        if not message.get('more_body'):
+            return body
+
+
+async def _send(send, status, body, content_type):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type),
+            (b'content-length', str(len(body)).encode())
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, warm)
+            except Exception as e:
+                logger.exception("Startup failed")
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    method, path = scope['method'], scope['path'].rstrip('/') or '/'
+    handler = ROUTES.get((method, path))
+
+    try:
+        if handler is None:
+            if any(route_path == path for _, route_path in ROUTES):
+                raise APIError(405, f"Method {method} not allowed for {path}")
+            raise APIError(404, f"No endpoint at {path}")
+
+        body = await _read_body(receive)
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            raise APIError(400, "Request body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise APIError(400, "Request body must be a JSON object")
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+
+        metrics.increment('api_requests')
+        with metrics.timer('api_request'):
+            executor = _ai_executor if handler in AI_HANDLERS else None
+            result = await asyncio.get_running_loop().run_in_executor(executor, handler, payload, query)
+    except APIError as e:
+        metrics.increment('api_errors')
+        await _send(send, e.status, json.dumps({'error': e.message}).encode('utf-8'), b'application/json')
+        return
+    except Exception:
+        metrics.increment('api_errors')
+        logger.exception("Error handling %s %s", method, path)
+        await _send(send, 500, b'{"error": "Internal server error"}', b'application/json')
+        return
+
+    if isinstance(result, str):
+        await _send(send, 200, result.encode('utf-8'), b'text/plain; version=0.0.4; charset=utf-8')
+    else:
+        await _send(send, 200, json.dumps(result, ensure_ascii=False).encode('utf-8'),
+                    b'application/json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve DishGPT recipe search over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='worker processes, each with its own warm index')
+    parser.add_argument('--log-level', default=os.getenv('DISHGPT_LOG_LEVEL', 'info').lower())
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    import uvicorn
+    uvicorn.run('api:app', host=args.host, port=args.port, workers=args.workers,
+                log_level=args.log_level)
+
+
+if __name__ == '__main__':
+    main()
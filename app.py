@@ -1,7 +1,23 @@
+import logging
+import os
 import streamlit as st
-from utils.matcher import find_matching_recipes, get_substitutes_for_ingredient
-from utils.normalizer import normalize_ingredient_list
-from utils.ai_helper import generate_ai_recipes
+from utils.matcher import (
+    PRELOAD_BACKENDS,
+    get_recipe_index,
+    get_substitutes_for_ingredients,
+    resolve_ingredients,
+    warm_up
+)
+from utils.ai_helper import get_model_handle
+from utils.reloader import HOT_RELOAD_ENABLED, start_watcher
+from utils.search import start_search
+from utils.session import MatchSession
+
+# Diagnostics from utils go through logging; DISHGPT_LOG_LEVEL=DEBUG shows everything
+logging.basicConfig(
+    level=os.getenv('DISHGPT_LOG_LEVEL', 'WARNING').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
 
 # Page configuration
 st.set_page_config(
@@ -167,7 +183,29 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 
+# Recipe cards shown per section before "Show more"
+RESULTS_PAGE_SIZE = 10
+
+
+@st.cache_resource
+def warm_backend():
+    """
+    Load the data every session shares, once per server process
+    
+    The recipe index, substitutes and AI model handle are process-wide in
+    utils; this builds them before the first search and starts the data
+    watcher, so edits to the recipe files go live without a restart.
+    """
+    if HOT_RELOAD_ENABLED:
+        start_watcher()
+    for backend in PRELOAD_BACKENDS:
+        warm_up(backend)
+    return get_model_handle()
+
+
 def main():
+    warm_backend()
+    
     # Header
     st.markdown('<div class="main-header">🍳 DishGPT</div>', unsafe_allow_html=True)
     st.markdown('<div class="sub-header">✨ Cook delicious meals with what you already have! ✨</div>', unsafe_allow_html=True)
@@ -199,78 +237,43 @@ def main():
         # AI Toggle
         use_ai = st.checkbox("🤖 Use AI for more recipes", value=True, help="Generate additional recipes using AI")
         
+        use_substitutes = st.checkbox(
+            "🔄 Count substitutes as matches", value=False,
+            help="e.g. tofu counts for chicken when it's a listed substitute"
+        )
+        
         search_button = st.button("🔍 Find Recipes", use_container_width=True, type="primary")
         
         st.markdown("---")
         st.success("### 💡 How it works\n\n✅ Enter 1+ ingredients\n\n✅ See recipes you can make NOW\n\n✅ Get shopping list for others\n\n✅ Smart substitutes included")
         
         st.markdown("---")
-        st.info("### 📊 Database\n\n**18 recipes** loaded!\n\n🤖 **AI:** " + ("Enabled" if use_ai else "Disabled"))
+        st.info(f"### 📊 Database\n\n**{len(get_recipe_index())} recipes** loaded!\n\n🤖 **AI:** " + ("Enabled" if use_ai else "Disabled"))
     
     # Main content
-    if search_button and user_input.strip():
-        ingredients = normalize_ingredient_list(user_input)
+    if search_button:
+        if not user_input.strip():
+            st.warning("⚠️ Please enter ingredients first!")
+            return
+        
+        # Misspelled or regional names are mapped to known ingredients
+        resolved = resolve_ingredients(user_input)
+        ingredients = list(dict.fromkeys(name for _, name, _ in resolved))
         
         if not ingredients:
             st.warning("⚠️ Please enter at least one ingredient!")
             return
         
-        # Display entered ingredients
-        st.markdown('<div class="section-header">🛒 Your Ingredients</div>', unsafe_allow_html=True)
-        
-        ing_html = ""
-        for ing in ingredients:
-            ing_html += f'<span class="ing-pill ing-have">✓ {ing.title()}</span>'
-        st.markdown(ing_html, unsafe_allow_html=True)
-        
-        st.markdown("<br><br>", unsafe_allow_html=True)
-        
-        # Search database recipes
-        with st.spinner("🔎 Searching database recipes..."):
-            db_recipes = find_matching_recipes(
-                user_ingredients=ingredients,
-                dietary_filter=selected_filter,
-                min_score=0
-            )
-        
-        # Generate AI recipes if enabled
-        ai_recipes = []
-        if use_ai:
-            with st.spinner("🤖 AI is generating custom recipes for you..."):
-                ai_recipes = generate_ai_recipes(
-                    user_ingredients=ingredients,
-                    dietary_filter=selected_filter,
-                    num_recipes=2
-                )
-                
-                if ai_recipes:
-                    st.success(f"✨ AI generated {len(ai_recipes)} custom recipe(s)!")
-        
-        # Combine all recipes
-        all_recipes = db_recipes + ai_recipes
-        
-        if all_recipes:
-            # Separate recipes
-            can_make = [r for r in all_recipes if r.get('match_info', {}).get('can_make_now', False)]
-            need_more = [r for r in all_recipes if not r.get('match_info', {}).get('can_make_now', False)]
-            
-            if can_make:
-                st.markdown(f'<div class="section-header">🎉 Ready to Cook! ({len(can_make)} recipes)</div>', unsafe_allow_html=True)
-                for idx, recipe in enumerate(can_make):
-                    is_ai = recipe.get('id', 0) >= 100
-                    display_recipe_card(recipe, ingredients, idx, can_make_now=True, is_ai_generated=is_ai)
-            
-            if need_more:
-                st.markdown(f'<div class="section-header">🛍️ Need a Few More Items ({len(need_more)} recipes)</div>', unsafe_allow_html=True)
-                for idx, recipe in enumerate(need_more[:10]):
-                    is_ai = recipe.get('id', 0) >= 100
-                    display_recipe_card(recipe, ingredients, idx, can_make_now=False, is_ai_generated=is_ai)
-        else:
-            st.error("😔 No recipes found with those ingredients!")
-            st.info("💡 **Tip:** Try enabling AI or use more common ingredients like rice, egg, chicken, etc.")
+        # Searching for the same pantry again keeps the results already found
+        query = (tuple(ingredients), selected_filter, use_ai, use_substitutes)
+        search = st.session_state.get('search')
+        if search is None or search['query'] != query:
+            st.session_state['search'] = new_search(query, resolved)
     
-    elif search_button:
-        st.warning("⚠️ Please enter ingredients first!")
+    # Reruns (opening a card, paging) redraw the last search without redoing it
+    search = st.session_state.get('search')
+    if search is not None:
+        display_search(search)
     
     else:
         # Welcome screen
@@ -322,14 +325,155 @@ def main():
             st.info("**Try:** `egg, bread`\n\n→ Quick breakfast options")
 
 
-def display_recipe_card(recipe, user_ingredients, index, can_make_now=False, is_ai_generated=False):
-    """Display recipe card"""
+def new_search(query, resolved):
+    """
+    Start database matching and AI generation for a pantry
+    
+    Returns:
+        dict: Search state kept in st.session_state; reruns pick up the
+            running job from it instead of searching again
+    """
+    ingredients, dietary_filter, use_ai, use_substitutes = query
+    
+    # Refining the pantry only rescores the recipes whose ingredients changed
+    session = None
+    if not use_substitutes:
+        session = st.session_state.get('match_session')
+        if session is None or session.dietary_filter != dietary_filter:
+            session = st.session_state['match_session'] = MatchSession(dietary_filter=dietary_filter)
+    
+    # Database search and AI generation run at the same time
+    job = start_search(
+        user_ingredients=list(ingredients),
+        dietary_filter=dietary_filter,
+        use_ai=use_ai,
+        num_ai_recipes=2,
+        session=session,
+        min_score=0,
+        use_substitutes=use_substitutes
+    )
+    
+    return {
+        'query': query,
+        'resolved': resolved,
+        'ingredients': list(ingredients),
+        'job': job,
+        'db_recipes': None,
+        'ai_recipes': [],
+        'shown': {'ready': RESULTS_PAGE_SIZE, 'need': RESULTS_PAGE_SIZE},
+        'key': f"{abs(hash(query)):x}"
+    }
+
+
+def display_search(search):
+    """Show a search's ingredients and results, waiting for any still running"""
+    ingredients = search['ingredients']
+    job = search['job']
+    
+    # Display entered ingredients
+    st.markdown('<div class="section-header">🛒 Your Ingredients</div>', unsafe_allow_html=True)
+    
+    ing_html = ""
+    shown = set()
+    for entered, ing, _ in search['resolved']:
+        if ing in shown:
+            continue
+        shown.add(ing)
+        label = ing.title() if entered == ing else f"{ing.title()} ({entered})"
+        ing_html += f'<span class="ing-pill ing-have">✓ {label}</span>'
+    st.markdown(ing_html, unsafe_allow_html=True)
+    
+    st.markdown("<br><br>", unsafe_allow_html=True)
+    
+    ai_status = st.empty()
+    results = st.empty()
+    
+    # Show database recipes as soon as they are ready
+    if search['db_recipes'] is None:
+        with st.spinner("🔎 Searching database recipes..."):
+            search['db_recipes'] = job.database_results()
+    
+    # Add each AI recipe as soon as it arrives (or give up at the deadline).
+    # Cards are previews until the search is complete: interactive widgets
+    # can only be drawn once per run.
+    if job.ai_pending():
+        if search['db_recipes']:
+            with results.container():
+                display_results(search['db_recipes'] + search['ai_recipes'], ingredients, search, interactive=False)
+        
+        with st.spinner("🤖 AI is generating custom recipes for you..."):
+            for recipe in job.iter_ai_results():
+                search['ai_recipes'].append(recipe)
+                with results.container():
+                    display_results(search['db_recipes'] + search['ai_recipes'], ingredients, search, interactive=False)
+    
+    if search['ai_recipes']:
+        ai_status.success(f"✨ AI generated {len(search['ai_recipes'])} custom recipe(s)!")
+    elif job.ai_timed_out:
+        ai_status.info("⏱️ AI took too long - showing database recipes only")
+    
+    with results.container():
+        display_results(search['db_recipes'] + search['ai_recipes'], ingredients, search)
+
+
+def _show_more(search, section):
+    search['shown'][section] += RESULTS_PAGE_SIZE
+
+
+def display_results(all_recipes, ingredients, search, interactive=True):
+    """
+    Display recipe results, split into ready-to-cook and need-more sections
+    
+    Each section shows search['shown'][section] cards; with `interactive`,
+    a "Show more" button pages further and cards can be opened.
+    """
+    if all_recipes:
+        # Separate recipes
+        can_make = [r for r in all_recipes if r.get('match_info', {}).get('can_make_now', False)]
+        need_more = [r for r in all_recipes if not r.get('match_info', {}).get('can_make_now', False)]
+        
+        if can_make:
+            st.markdown(f'<div class="section-header">🎉 Ready to Cook! ({len(can_make)} recipes)</div>', unsafe_allow_html=True)
+            display_page(can_make, 'ready', ingredients, search, interactive)
+        
+        if need_more:
+            st.markdown(f'<div class="section-header">🛍️ Need a Few More Items ({len(need_more)} recipes)</div>', unsafe_allow_html=True)
+            display_page(need_more, 'need', ingredients, search, interactive)
+    else:
+        st.error("😔 No recipes found with those ingredients!")
+        st.info("💡 **Tip:** Try enabling AI or use more common ingredients like rice, egg, chicken, etc.")
+
+
+def display_page(recipes, section, ingredients, search, interactive):
+    """Display the cards of one results section shown so far"""
+    shown = search['shown'][section]
+    for idx, recipe in enumerate(recipes[:shown]):
+        is_ai = recipe.get('id', 0) >= 100
+        key = f"{search['key']}-{section}-{idx}" if interactive else None
+        display_recipe_card(recipe, ingredients, idx, can_make_now=section == 'ready', is_ai_generated=is_ai, key=key)
+    
+    if interactive and len(recipes) > shown:
+        st.button(
+            f"⬇️ Show more ({len(recipes) - shown} left)",
+            key=f"{search['key']}-{section}-more",
+            on_click=_show_more,
+            args=(search, section)
+        )
+
+
+def display_recipe_card(recipe, user_ingredients, index, can_make_now=False, is_ai_generated=False, key=None):
+    """
+    Display recipe card
+    
+    The ingredient breakdown and instructions are only built once the card
+    is opened; without a widget `key` the card is a closed preview.
+    """
     
-    # For AI recipes, calculate match info if not present
+    # For AI recipes, calculate match info if not present (without
+    # modifying the recipe, which may be shared)
     if 'match_info' not in recipe:
         from utils.matcher import calculate_match_score
         match_info = calculate_match_score(user_ingredients, recipe)
-        recipe['match_info'] = match_info
     else:
         match_info = recipe['match_info']
     
@@ -360,17 +504,26 @@ def display_recipe_card(recipe, user_ingredients, index, can_make_now=False, is_
         else:
             st.markdown(f'<span class="match-badge">{score}% Match</span>', unsafe_allow_html=True)
     
+    if key is None or not st.toggle("📋 Ingredients & instructions", key=key):
+        st.markdown("<br>", unsafe_allow_html=True)
+        return
+    
     # Ingredients
-    with st.expander("📋 **Ingredients Breakdown**", expanded=can_make_now):
+    with st.container():
+        st.markdown("#### 📋 Ingredients Breakdown")
         col_have, col_need = st.columns(2)
         
         with col_have:
             st.markdown("### ✅ You Have")
             matched = match_info.get('matched', [])
+            substituted = {s['ingredient']: s['substitute'] for s in match_info.get('substitutions', [])}
             if matched:
                 html = ""
                 for ing in matched:
-                    html += f'<span class="ing-pill ing-have">✓ {ing.title()}</span>'
+                    if ing in substituted:
+                        html += f'<span class="ing-pill ing-have">✓ {substituted[ing].title()} (for {ing.title()})</span>'
+                    else:
+                        html += f'<span class="ing-pill ing-have">✓ {ing.title()}</span>'
                 st.markdown(html, unsafe_allow_html=True)
             else:
                 st.write("_(None)_")
@@ -379,12 +532,13 @@ def display_recipe_card(recipe, user_ingredients, index, can_make_now=False, is_
             st.markdown("### 🛒 You Need")
             missing_mandatory = match_info.get('missing_mandatory', [])
             missing_optional = match_info.get('missing_optional', [])
+            substitutes = get_substitutes_for_ingredients(missing_mandatory + missing_optional)
             
             if missing_mandatory:
                 st.markdown("**MUST HAVE:**")
                 for ing in missing_mandatory:
                     st.markdown(f'<span class="ing-pill ing-need-mandatory">⚠️ {ing.title()}</span>', unsafe_allow_html=True)
-                    subs = get_substitutes_for_ingredient(ing)
+                    subs = substitutes[ing]
                     if subs:
                         st.caption(f"   → Or use: {', '.join(subs[:3])}")
             
@@ -392,7 +546,7 @@ def display_recipe_card(recipe, user_ingredients, index, can_make_now=False, is_
                 st.markdown("**OPTIONAL:**")
                 for ing in missing_optional:
                     st.markdown(f'<span class="ing-pill ing-need-optional">○ {ing.title()}</span>', unsafe_allow_html=True)
-                    subs = get_substitutes_for_ingredient(ing)
+                    subs = substitutes[ing]
                     if subs:
                         st.caption(f"   → Or: {', '.join(subs[:3])}")
             
@@ -400,7 +554,8 @@ def display_recipe_card(recipe, user_ingredients, index, can_make_now=False, is_
                 st.success("🎉 You have everything!")
     
     # Instructions
-    with st.expander("👨‍🍳 **Cooking Instructions**"):
+    with st.container():
+        st.markdown("#### 👨‍🍳 Cooking Instructions")
         instructions = recipe.get('instructions', [])
         for i, step in enumerate(instructions, 1):
             st.markdown(f"**Step {i}:** {step}")
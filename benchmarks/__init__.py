@@ -0,0 +1,7 @@
+"""
+DishGPT Benchmarks
+Synthetic corpora, pantry workloads and timed scenarios for the matching pipeline
+
+Run from the repository root:
+    python -m benchmarks.run --sizes 1k 10k --output bench.json
+"""
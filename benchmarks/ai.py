@@ -0,0 +1,128 @@
+"""
+Timed scenarios for the AI path, run offline against FakeProvider
+
+The fake model's latency is known, so whatever the scenarios measure on
+top of it is our own overhead: prompt building, parsing, validation,
+caching and concurrency.
+
+Usage:
+    python -m benchmarks.ai --latency 0.2 --jitter 0.05 --output ai.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import DEFAULT_SEED, generate_pantries
+from benchmarks.run import measure, print_results, git_revision
+from utils import ai_helper
+from utils.cache import DiskCache
+from utils.normalizer import normalize_ingredient_list
+from utils.providers import FakeModel, FakeProvider
+from utils.search import start_search
+
+DEFAULT_QUERIES = 50
+
+
+def _first_streamed(pantry):
+    for recipe in ai_helper.stream_ai_recipes(pantry, use_cache=False):
+        return recipe
+
+
+def _concurrent_searches(pantries):
+    jobs = [start_search(pantry, use_ai=True, limit=10) for pantry in pantries]
+    for job in jobs:
+        job.database_results()
+        job.ai_results()
+
+
+def run_ai(queries, latency, jitter, error_rate, malformed_rate, fence_rate, seed=DEFAULT_SEED):
+    """Run every AI scenario with a FakeProvider configured as given"""
+    options = {
+        'latency': latency,
+        'jitter': jitter,
+        'error_rate': error_rate,
+        'malformed_rate': malformed_rate,
+        'fence_rate': fence_rate,
+        'seed': seed
+    }
+    label = f'{latency * 1000:.0f}ms'
+    pantries = [normalize_ingredient_list(p) for p in generate_pantries(queries, seed)]
+    prompts = [ai_helper.create_recipe_prompt(p) for p in pantries]
+    results = []
+
+    previous_provider = ai_helper.get_model_provider()
+    previous_limits = ai_helper.ai_limits_status()
+    ai_helper.set_model_provider(FakeProvider(**options))
+    # Measure the pipeline, not the production call limits
+    ai_helper.set_ai_limits(0, 0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            cache = DiskCache(os.path.join(directory, 'ai.sqlite3'))
+            ai_helper.set_ai_cache(cache)
+
+            texts = [FakeModel(latency=0, fence_rate=fence_rate, seed=seed).generate_content(p).text for p in prompts]
+            results.append(measure('parse_ai_response', label, ai_helper.parse_ai_response, texts))
+            results.append(measure('create_recipe_prompt', label, ai_helper.create_recipe_prompt, pantries))
+
+            results.append(measure(
+                'generate_ai_recipes', label,
+                lambda p: ai_helper.generate_ai_recipes(p, use_cache=False), pantries, memory_sample=5
+            ))
+            results.append(measure('stream_ai_recipes_first', label, _first_streamed, pantries, memory_sample=5))
+
+            for pantry in pantries:
+                ai_helper.generate_ai_recipes(pantry)
+            results.append(measure('generate_ai_recipes_cached', label, ai_helper.generate_ai_recipes, pantries))
+
+            # One op = all pantries searched at once
+            cache.clear()
+            results.append(measure(
+                'concurrent_search', label, _concurrent_searches, [pantries], memory_sample=0
+            ))
+        finally:
+            ai_helper.set_model_provider(previous_provider)
+            ai_helper.set_ai_limits(previous_limits['max_concurrent'], previous_limits['rate_per_minute'])
+            ai_helper.set_ai_cache(None)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the AI path offline')
+    parser.add_argument('--queries', type=int, default=DEFAULT_QUERIES)
+    parser.add_argument('--latency', type=float, default=0.2, help='simulated model latency (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--fence-rate', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='JSON file from an earlier run to compare against')
+    args = parser.parse_args()
+
+    results = run_ai(args.queries, args.latency, args.jitter, args.error_rate,
+                     args.malformed_rate, args.fence_rate, args.seed)
+    run = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'options': vars(args),
+        'results': results
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
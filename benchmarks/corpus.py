@@ -0,0 +1,180 @@
+"""
+Deterministic synthetic recipe corpora and pantry workloads
+
+Corpora follow the data/recipes.json schema. Ingredient popularity is
+Zipf-skewed: a few staples (the names used in the shipped data) appear in
+most recipes, while a long tail of synthetic ingredients appears rarely,
+which is roughly how real recipe collections look.
+
+Usage:
+    python -m benchmarks.corpus 10000 recipes-10k.json [--seed 42]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+
+# Corpus sizes the benchmark knows by name
+SIZES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000
+}
+
+DEFAULT_SEED = 42
+VOCABULARY_SIZE = 5000
+ZIPF_EXPONENT = 1.1
+
+CUISINES = ['Indian', 'Chinese', 'Italian', 'Continental', 'Asian', 'Mexican', 'Fusion']
+DIFFICULTIES = ['easy', 'medium', 'hard']
+TAGS = ['quick', 'easy', 'spicy', 'healthy', 'comfort', 'breakfast', 'dinner']
+VERBS = ['Chop', 'Heat', 'Stir', 'Boil', 'Fry', 'Mix', 'Simmer', 'Bake', 'Season', 'Serve']
+
+# Raw-input variations used in pantries, so normalization has work to do
+VARIANTS = ['{}', '{}', '{}', '{}s', 'fresh {}', '{} ', ' {}', 'chopped {}']
+
+
+def _seed_ingredients(data_dir='data'):
+    """Real ingredient names from the shipped data, most common first"""
+    counts = {}
+    try:
+        with open(os.path.join(data_dir, 'recipes.json'), 'r', encoding='utf-8') as f:
+            for recipe in json.load(f).get('recipes', []):
+                for kind in ('mandatory', 'optional'):
+                    for ingredient in recipe['ingredients'].get(kind, []):
+                        counts[ingredient['name']] = counts.get(ingredient['name'], 0) + 1
+    except (OSError, ValueError):
+        pass
+    return sorted(counts, key=lambda name: (-counts[name], name))
+
+
+class IngredientSampler:
+    """
+    Zipf-weighted ingredient vocabulary
+
+    Args:
+        seed (int): Seed for every random choice
+        vocabulary_size (int): Number of distinct ingredients
+        exponent (float): Zipf exponent; higher means more skew
+    """
+
+    def __init__(self, seed=DEFAULT_SEED, vocabulary_size=VOCABULARY_SIZE, exponent=ZIPF_EXPONENT):
+        self.rng = random.Random(seed)
+        real = _seed_ingredients()[:vocabulary_size]
+        synthetic = [f'ingredient {i:05d}' for i in range(vocabulary_size - len(real))]
+        self.vocabulary = real + synthetic
+        weights = [1 / (rank ** exponent) for rank in range(1, len(self.vocabulary) + 1)]
+        self.cumulative = list(itertools.accumulate(weights))
+
+    def sample(self, count):
+        """`count` distinct ingredients, popular ones more likely"""
+        count = min(count, len(self.vocabulary))
+        chosen = []
+        seen = set()
+        while len(chosen) < count:
+            for name in self.rng.choices(self.vocabulary, cum_weights=self.cumulative, k=count):
+                if name not in seen and len(chosen) < count:
+                    seen.add(name)
+                    chosen.append(name)
+        return chosen
+
+
+def generate_recipes(count, seed=DEFAULT_SEED):
+    """
+    Generate `count` recipes in the recipes.json schema
+
+    Args:
+        count (int): Number of recipes
+        seed (int): Same seed, same corpus
+
+    Returns:
+        list: Recipe dictionaries
+    """
+    sampler = IngredientSampler(seed)
+    rng = sampler.rng
+    recipes = []
+
+    for recipe_id in range(1, count + 1):
+        names = sampler.sample(rng.randint(2, 10))
+        split = rng.randint(1, min(4, len(names)))
+        mandatory, optional = names[:split], names[split:]
+
+        substitutes = {}
+        for name in rng.sample(names, rng.randint(0, min(2, len(names)))):
+            substitutes[name] = sampler.sample(rng.randint(1, 3))
+
+        recipes.append({
+            'id': recipe_id,
+            'name': f'Synthetic Recipe {recipe_id}',
+            'cuisine': rng.choice(CUISINES),
+            'type': rng.choice(['veg', 'non-veg']),
+            'prep_time': f'{rng.randint(1, 6) * 5} mins',
+            'cook_time': f'{rng.randint(1, 12) * 5} mins',
+            'servings': rng.randint(1, 6),
+            'ingredients': {
+                'mandatory': [{'name': n, 'amount': '1 cup', 'category': 'other'} for n in mandatory],
+                'optional': [{'name': n, 'amount': '1 tsp', 'category': 'other'} for n in optional]
+            },
+            'substitutes': substitutes,
+            'instructions': [
+                f'{rng.choice(VERBS)} the {rng.choice(names)} for {rng.randint(1, 15)} minutes'
+                for _ in range(rng.randint(3, 8))
+            ],
+            'tags': rng.sample(TAGS, 2),
+            'difficulty': rng.choice(DIFFICULTIES)
+        })
+
+    return recipes
+
+
+def generate_substitutes(seed=DEFAULT_SEED, count=500):
+    """A substitutes.json-style mapping for the most popular ingredients"""
+    sampler = IngredientSampler(seed + 1)
+    return {name: sampler.sample(3) for name in sampler.vocabulary[:count]}
+
+
+def generate_pantries(count, seed=DEFAULT_SEED, min_size=1, max_size=8):
+    """
+    Generate pantry queries as raw user input
+
+    Args:
+        count (int): Number of pantries
+        seed (int): Same seed, same workload
+        min_size (int): Fewest ingredients per pantry
+        max_size (int): Most ingredients per pantry
+
+    Returns:
+        list: Comma-separated ingredient strings, as typed into the app
+    """
+    sampler = IngredientSampler(seed + 2)
+    rng = sampler.rng
+    pantries = []
+    for _ in range(count):
+        names = sampler.sample(rng.randint(min_size, max_size))
+        pantries.append(', '.join(rng.choice(VARIANTS).format(name) for name in names))
+    return pantries
+
+
+def write_corpus(path, count, seed=DEFAULT_SEED):
+    """Write a synthetic recipes.json file"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'recipes': generate_recipes(count, seed)}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic recipes.json corpus')
+    parser.add_argument('count', help='number of recipes, or one of: ' + ', '.join(SIZES))
+    parser.add_argument('output', help='path of the JSON file to write')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    count = SIZES.get(args.count.lower()) or int(args.count)
+    write_corpus(args.output, count, args.seed)
+    print(f"Wrote {count} recipes to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
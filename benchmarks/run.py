@@ -0,0 +1,298 @@
+"""
+Timed scenarios for the matching pipeline
+
+Each scenario runs an operation once per query of a deterministic workload
+against a synthetic corpus and reports throughput, p50/p99/mean latency and
+peak traced memory. Results can be saved as JSON and compared with an
+earlier run, so every performance change can be judged against the same
+numbers.
+
+Usage:
+    python -m benchmarks.run --sizes 1k 10k --output bench.json
+    python -m benchmarks.run --sizes 1k 10k --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import SIZES, DEFAULT_SEED, generate_recipes, generate_pantries, generate_substitutes
+from utils.matcher import (
+    RecipeIndex,
+    SubstituteStore,
+    calculate_match_score,
+    clear_result_cache,
+    find_matching_recipes,
+    find_matching_recipes_batch,
+    match_recipes,
+    reset_recipe_index,
+    set_recipe_index
+)
+from utils.normalizer import clear_normalize_cache, normalize_ingredient_list
+from utils.scoring import NUMPY_AVAILABLE
+from utils.store import RecipeStore, build_store
+
+DEFAULT_QUERIES = 500
+
+# Operations replayed under tracemalloc to measure peak memory
+MEMORY_SAMPLE = 50
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[int(round(fraction * (len(sorted_values) - 1)))]
+
+
+def measure(scenario, corpus, operation, inputs, memory_sample=MEMORY_SAMPLE, setup=None):
+    """
+    Time `operation(x)` for every x in `inputs`
+
+    Args:
+        scenario (str): Scenario name
+        corpus (str): Corpus size label
+        operation (callable): Operation to time
+        inputs (list): One input per timed call
+        memory_sample (int): Calls replayed under tracemalloc for peak memory
+        setup (callable): Run before the timed pass and before the memory pass
+
+    Returns:
+        dict: scenario, corpus, ops, ops_per_sec, p50_ms, p99_ms, mean_ms, peak_kb
+    """
+    if setup:
+        setup()
+
+    latencies = []
+    started = time.perf_counter()
+    for item in inputs:
+        call_started = time.perf_counter_ns()
+        operation(item)
+        latencies.append((time.perf_counter_ns() - call_started) / 1e6)
+    elapsed = time.perf_counter() - started
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    for item in inputs[:memory_sample]:
+        operation(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'scenario': scenario,
+        'corpus': corpus,
+        'ops': len(inputs),
+        'ops_per_sec': len(inputs) / elapsed if elapsed else 0.0,
+        'p50_ms': _percentile(latencies, 0.50),
+        'p99_ms': _percentile(latencies, 0.99),
+        'mean_ms': sum(latencies) / len(latencies) if latencies else 0.0,
+        'peak_kb': peak / 1024
+    }
+
+
+def backend_mismatches(pantries):
+    """Number of pantries where the python and vector backends disagree"""
+    if not NUMPY_AVAILABLE:
+        return None
+
+    mismatches = 0
+    for pantry in pantries:
+        expected = find_matching_recipes(pantry, limit=10, use_cache=False)
+        actual = find_matching_recipes(pantry, limit=10, backend='vector', use_cache=False)
+        if expected != actual:
+            mismatches += 1
+    return mismatches
+
+
+def _write_substitute_files(directory, recipes, seed):
+    """Data files for a SubstituteStore over the synthetic corpus"""
+    substitutes_path = os.path.join(directory, 'substitutes.json')
+    recipes_path = os.path.join(directory, 'recipes.json')
+
+    with open(substitutes_path, 'w', encoding='utf-8') as f:
+        json.dump({'substitutes': generate_substitutes(seed)}, f)
+    # Only the per-recipe substitute blocks matter to the store
+    with open(recipes_path, 'w', encoding='utf-8') as f:
+        json.dump({'recipes': [{'substitutes': r['substitutes']} for r in recipes]}, f)
+
+    return substitutes_path, recipes_path
+
+
+def run_corpus(label, count, queries, seed=DEFAULT_SEED):
+    """Run every scenario against one synthetic corpus"""
+    print(f"Generating {label} corpus ({count} recipes)...", file=sys.stderr)
+    recipes = generate_recipes(count, seed)
+    pantries = generate_pantries(queries, seed)
+    normalized = [normalize_ingredient_list(p) for p in pantries]
+    results = []
+
+    results.append(measure('index_build', label, RecipeIndex, [recipes], memory_sample=1))
+
+    with tempfile.TemporaryDirectory() as directory:
+        store_path = os.path.join(directory, 'recipes.bin')
+        build_store(recipes, store_path)
+        results.append(measure('recipe_store_open', label, RecipeStore, [store_path], memory_sample=1))
+        results.append(measure(
+            'index_from_store', label,
+            lambda path: RecipeIndex.from_store(RecipeStore(path)), [store_path], memory_sample=1
+        ))
+
+    index = RecipeIndex(recipes)
+    set_recipe_index(index)
+
+    try:
+        results.append(measure(
+            'normalize_ingredient_list', label, normalize_ingredient_list, pantries,
+            setup=clear_normalize_cache
+        ))
+
+        pairs = [(normalized[i], recipes[i % len(recipes)]) for i in range(queries)]
+        results.append(measure(
+            'calculate_match_score', label, lambda pair: calculate_match_score(*pair), pairs
+        ))
+
+        results.append(measure(
+            'find_matching_recipes', label,
+            lambda p: find_matching_recipes(p, use_cache=False), pantries
+        ))
+        results.append(measure(
+            'find_matching_recipes_top10', label,
+            lambda p: find_matching_recipes(p, limit=10, use_cache=False), pantries
+        ))
+        if NUMPY_AVAILABLE:
+            results.append(measure(
+                'find_matching_recipes_top10_vector', label,
+                lambda p: find_matching_recipes(p, limit=10, backend='vector', use_cache=False),
+                pantries
+            ))
+
+        # One op = every pantry of the workload in a single batch call
+        results.append(measure(
+            'find_matching_recipes_batch_top10', label,
+            lambda ps: list(find_matching_recipes_batch(ps, limit=10)), [pantries], memory_sample=1
+        ))
+        if NUMPY_AVAILABLE:
+            results.append(measure(
+                'find_matching_recipes_batch_top10_vector', label,
+                lambda ps: list(find_matching_recipes_batch(ps, limit=10, backend='vector')),
+                [pantries], memory_sample=1
+            ))
+
+        # Every pantry has been seen once, so this is the warm-cache path
+        clear_result_cache()
+        for pantry in pantries:
+            find_matching_recipes(pantry, limit=10)
+        results.append(measure(
+            'find_matching_recipes_cached', label,
+            lambda p: find_matching_recipes(p, limit=10), pantries
+        ))
+        # Same, returning (Recipe, MatchInfo) pairs instead of dictionaries
+        results.append(measure(
+            'match_recipes_cached', label,
+            lambda p: match_recipes(p, limit=10), pantries
+        ))
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = _write_substitute_files(directory, recipes, seed)
+            results.append(measure(
+                'substitute_store_load', label,
+                lambda _: SubstituteStore(*paths, store_path=None).lookup(), [None], memory_sample=1
+            ))
+
+            store = SubstituteStore(*paths, store_path=None)
+            store.lookup()
+            names = [name for pantry in normalized for name in pantry]
+            results.append(measure('get_substitutes_for_ingredient', label, store.get, names))
+            results.append(measure('get_substitutes_for_ingredients', label, store.get_many, normalized))
+
+        mismatches = backend_mismatches(pantries[:100])
+    finally:
+        reset_recipe_index()
+        clear_result_cache()
+
+    return results, mismatches
+
+
+def git_revision():
+    """Short git revision of the working tree, if available"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    """Print a results table, with ratios against a baseline run if given"""
+    previous = {}
+    if baseline:
+        previous = {(r['scenario'], r['corpus']): r for r in baseline['results']}
+
+    header = f"{'scenario':38} {'corpus':>6} {'ops/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak KB':>10}"
+    if previous:
+        header += f" {'p50 vs base':>12}"
+    print(header)
+    print('-' * len(header))
+
+    for r in results:
+        line = (f"{r['scenario']:38} {r['corpus']:>6} {r['ops_per_sec']:>12.1f} "
+                f"{r['p50_ms']:>10.4f} {r['p99_ms']:>10.4f} {r['peak_kb']:>10.1f}")
+        before = previous.get((r['scenario'], r['corpus']))
+        if before and before['p50_ms']:
+            line += f" {r['p50_ms'] / before['p50_ms']:>11.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the DishGPT matching pipeline')
+    parser.add_argument('--sizes', nargs='+', default=['1k', '10k'], choices=list(SIZES),
+                        help='corpus sizes to run (default: 1k 10k)')
+    parser.add_argument('--queries', type=int, default=DEFAULT_QUERIES,
+                        help='pantry queries per scenario')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='JSON file from an earlier run to compare against')
+    args = parser.parse_args()
+
+    run = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'seed': args.seed,
+        'queries': args.queries,
+        'results': [],
+        'backend_mismatches': {}
+    }
+
+    for label in args.sizes:
+        results, mismatches = run_corpus(label, SIZES[label], args.queries, args.seed)
+        run['results'].extend(results)
+        run['backend_mismatches'][label] = mismatches
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_results(run['results'], baseline)
+    for label, mismatches in run['backend_mismatches'].items():
+        if mismatches:
+            print(f"WARNING: python and vector backends disagree on {mismatches} queries ({label})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
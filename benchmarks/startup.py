@@ -0,0 +1,105 @@
+"""
+Cold-start timings for short-lived processes
+
+Each scenario runs a small Python snippet in a fresh interpreter, the way
+a CLI call, a batch worker or a newly spawned API worker starts. Times are
+wall clock for the whole process, interpreter start included ('interpreter'
+is the floor); peak KB is the process's peak resident set size.
+
+Usage:
+    python -m benchmarks.startup --runs 20 --output startup.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from benchmarks.run import _percentile, git_revision, print_results
+
+DEFAULT_RUNS = 10
+
+SCENARIOS = [
+    ('interpreter', 'pass'),
+    ('import_utils', 'import utils'),
+    ('import_matcher', 'from utils import find_matching_recipes'),
+    ('first_search', "from utils import find_matching_recipes; find_matching_recipes(['chicken', 'rice'])"),
+    ('warm_up', 'from utils import warm_up; warm_up()'),
+    ('import_ai_helper', 'import utils.ai_helper'),
+    ('import_gemini', 'import google.generativeai')
+]
+
+
+# Appended to every scenario: print the process's peak resident set size
+# (VmHWM, Linux only; 0 elsewhere). ru_maxrss would include the memory of
+# the benchmark process the child was forked from.
+_REPORT_PEAK = """
+import os
+peak = 0
+if os.path.exists('/proc/self/status'):
+    with open('/proc/self/status') as status:
+        peak = next((int(line.split()[1]) for line in status if line.startswith('VmHWM:')), 0)
+print(peak)
+"""
+
+
+def _run_once(code, cwd):
+    """Wall time (ms) and peak RSS (KB) of one fresh interpreter running `code`"""
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, '-c', code + '\n' + _REPORT_PEAK], cwd=cwd,
+                             capture_output=True, text=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if process.returncode:
+        raise RuntimeError(f"Scenario failed with exit code {process.returncode}: {code}\n{process.stderr}")
+    return elapsed, int(process.stdout.split()[-1])
+
+
+def run_startup(runs, scenarios=SCENARIOS, cwd='.'):
+    """Time every scenario `runs` times; results are shaped like benchmarks.run.measure"""
+    results = []
+    for scenario, code in scenarios:
+        timings = [_run_once(code, cwd) for _ in range(runs)]
+        latencies = sorted(elapsed for elapsed, _ in timings)
+        total = sum(latencies)
+        results.append({
+            'scenario': scenario,
+            'corpus': 'cold',
+            'ops': runs,
+            'ops_per_sec': runs / (total / 1000) if total else 0.0,
+            'p50_ms': _percentile(latencies, 0.50),
+            'p99_ms': _percentile(latencies, 0.99),
+            'mean_ms': total / runs,
+            'peak_kb': max(rss for _, rss in timings)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark process cold start')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='fresh processes per scenario')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='JSON file from an earlier run to compare against')
+    args = parser.parse_args()
+
+    results = run_startup(args.runs)
+    run = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'options': vars(args),
+        'results': results
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""The SQLite catalog (utils.database) and the 'sql' backend"""
+
+import json
+
+import pytest
+
+from utils import matcher
+from utils.database import RecipeDatabase, import_json
+from utils.matcher import find_matching_recipes, find_matching_recipes_batch
+
+PANTRIES = [
+    ['chicken', 'rice', 'onion'],
+    ['egg', 'bread', 'butter'],
+    ['tomato', 'garlic', 'pasta', 'olive oil'],
+    ['paneer', 'spinach'],
+    ['potato']
+]
+
+
+@pytest.fixture(scope='module')
+def database(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('catalog') / 'recipes.sqlite3')
+    import_json('data/recipes.json', 'data/substitutes.json', path)
+    matcher.set_recipe_database(RecipeDatabase(path, readonly=True))
+    yield matcher.get_recipe_database()
+    matcher.set_recipe_database(None)
+    matcher.clear_result_cache()
+
+
+def test_round_trip(database):
+    with open('data/recipes.json', encoding='utf-8') as f:
+        assert database.load_recipes() == json.load(f)['recipes']
+    with open('data/substitutes.json', encoding='utf-8') as f:
+        assert database.load_substitutes() == json.load(f)['substitutes']
+
+
+@pytest.mark.parametrize('pantry', PANTRIES)
+@pytest.mark.parametrize('dietary_filter', [None, 'veg'])
+def test_sql_ranks_like_python(database, pantry, dietary_filter):
+    expected = find_matching_recipes(pantry, dietary_filter, use_cache=False)
+    assert find_matching_recipes(pantry, dietary_filter, backend='sql', use_cache=False) == expected
+
+
+def test_sql_batch_ranks_like_python(database):
+    expected = list(find_matching_recipes_batch(PANTRIES, limit=5))
+    assert list(find_matching_recipes_batch(PANTRIES, limit=5, backend='sql')) == expected
+
+
+def test_many_candidates(database):
+    # More names and positions than SQLite allows bound variables
+    names = [f'ingredient {i}' for i in range(40000)] + ['rice']
+    assert {position for position, _, _ in database.candidates(names)} >= \
+        {position for position, _, _ in database.candidates(['rice'])}
+    assert len(database.recipes(range(40000))) == len(database)
+
+
+def test_missing_database_is_an_error(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        RecipeDatabase(str(tmp_path / 'missing.sqlite3'), readonly=True)
+    assert not (tmp_path / 'missing.sqlite3').exists()
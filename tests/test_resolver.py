@@ -0,0 +1,76 @@
+"""Fuzzy ingredient resolution (utils.resolver)"""
+
+import pytest
+
+from utils import find_matching_recipes
+from utils.matcher import get_ingredient_resolver
+from utils.resolver import IngredientResolver, edit_distance
+
+VOCABULARY = [
+    'chicken', 'chicken stock', 'chili powder', 'rice', 'rice noodles', 'celery leaves',
+    'tomato', 'garlic', 'onion', 'green onion', 'soy sauce', 'olive oil', 'pea', 'beef'
+]
+
+
+@pytest.fixture
+def resolver():
+    return IngredientResolver(VOCABULARY)
+
+
+@pytest.mark.parametrize('typo, expected', [
+    ('tomatos', 'tomato'),
+    ('chiken', 'chicken'),
+    ('garlik', 'garlic'),
+    ('green onoin', 'green onion'),
+    ('soy suace', 'soy sauce'),
+    ('olvie oil', 'olive oil'),
+    ('chiken stock', 'chicken stock')
+])
+def test_typos_resolve(resolver, typo, expected):
+    name, confidence = resolver.resolve(typo)
+    assert name == expected
+    assert 0 < confidence < 1
+
+
+@pytest.mark.parametrize('alias, expected', [
+    ('spring onion', 'green onion'),
+    ('capsicum', 'bell pepper'),
+    ('chicken breast', 'chicken')
+])
+def test_aliases_resolve(resolver, alias, expected):
+    assert resolver.resolve(alias) == (expected, 1.0)
+
+
+@pytest.mark.parametrize('ingredient', [
+    # One shared word doesn't make two multiword names the same ingredient
+    'curry powder', 'egg noodles', 'curry leaves', 'brown rice',
+    # ... nor does an alias key that looks alike
+    'chicken stock cube', 'chicken brest',
+    # Short words are too easily one letter from another ingredient
+    'pear', 'beet'
+])
+def test_different_ingredients_are_not_resolved(resolver, ingredient):
+    assert resolver.resolve(ingredient) == (ingredient, 0.0)
+
+
+def test_known_names_are_unchanged(resolver):
+    assert resolver.resolve('chicken stock') == ('chicken stock', 1.0)
+    assert resolver.resolve_list(['chiken', 'chicken', 'rice']) == ['chicken', 'rice']
+
+
+def test_edit_distance():
+    assert edit_distance('onion', 'onion') == 0
+    assert edit_distance('onoin', 'onion') == 1
+    assert edit_distance('stok', 'stock') == 1
+    assert edit_distance('curry', 'chili') == 4
+
+
+@pytest.mark.parametrize('ingredient', ['chicken stock', 'curry powder', 'egg noodles', 'curry leaves'])
+def test_shipped_data_keeps_unknown_multiword_names(ingredient):
+    assert get_ingredient_resolver().resolve(ingredient) == (ingredient, 0.0)
+
+
+def test_stock_does_not_make_chicken_recipes_cookable():
+    for recipe in find_matching_recipes(['chicken stock', 'rice']):
+        if recipe['match_info']['can_make_now']:
+            assert 'chicken' not in recipe['match_info']['matched']
@@ -0,0 +1,50 @@
+"""The vectorized backend (utils.scoring) ranks exactly like the pure-Python one"""
+
+import itertools
+
+import pytest
+
+from benchmarks.corpus import generate_pantries, generate_recipes
+from utils import matcher
+from utils.matcher import find_matching_recipes, find_matching_recipes_batch
+
+SEED = 7
+PANTRIES = generate_pantries(25, seed=SEED, max_size=12)
+
+OPTIONS = [
+    {'dietary_filter': dietary_filter, 'min_score': min_score, 'limit': limit,
+     'can_make_now_only': can_make_now_only}
+    for dietary_filter, min_score, limit, can_make_now_only in itertools.product(
+        (None, 'veg', 'non-veg'), (0, 30), (None, 0, 1, 10), (False, True)
+    )
+]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def synthetic_index():
+    recipes = generate_recipes(1000, seed=SEED)
+    # Recipes with no mandatory ingredients can always be made
+    for recipe in recipes[::50]:
+        recipe['ingredients']['mandatory'] = []
+    matcher.set_recipe_index(matcher.RecipeIndex(recipes))
+    yield
+    matcher.reset_recipe_index()
+    matcher.clear_result_cache()
+
+
+@pytest.mark.parametrize('options', OPTIONS, ids=lambda options: '-'.join(map(str, options.values())))
+def test_vector_matches_python(options):
+    for pantry in PANTRIES:
+        expected = find_matching_recipes(pantry, backend='python', use_cache=False, **options)
+        assert find_matching_recipes(pantry, backend='vector', use_cache=False, **options) == expected
+
+
+@pytest.mark.parametrize('options', OPTIONS[::5], ids=lambda options: '-'.join(map(str, options.values())))
+def test_vector_batch_matches_python(options):
+    expected = list(find_matching_recipes_batch(PANTRIES, backend='python', **options))
+    assert list(find_matching_recipes_batch(PANTRIES, backend='vector', chunk_size=16, **options)) == expected
+
+
+def test_empty_pantry():
+    assert find_matching_recipes([], backend='vector', use_cache=False) == \
+        find_matching_recipes([], backend='python', use_cache=False)
@@ -0,0 +1,62 @@
+"""The compiled recipe store (utils.store) ranks like recipes.json"""
+
+import json
+
+import pytest
+
+from utils import matcher
+from utils.matcher import RecipeIndex, match_recipes
+from utils.store import RecipeStore, build_store
+
+PANTRIES = [
+    ['chicken', 'rice', 'onion'],
+    ['egg', 'bread', 'butter'],
+    ['tomato', 'garlic', 'pasta', 'olive oil'],
+    ['paneer', 'spinach'],
+    ['potato']
+]
+
+
+@pytest.fixture(scope='module')
+def recipes():
+    with open('data/recipes.json', encoding='utf-8') as f:
+        return json.load(f)['recipes']
+
+
+@pytest.fixture(scope='module')
+def store(recipes, tmp_path_factory):
+    path = tmp_path_factory.mktemp('store') / 'recipes.bin'
+    build_store(recipes, str(path))
+    return RecipeStore(str(path))
+
+
+def _ranking(index, pantry, **options):
+    matcher.set_recipe_index(index)
+    try:
+        return [
+            (recipe.to_dict(), match_info)
+            for recipe, match_info in match_recipes(pantry, use_cache=False, **options)
+        ]
+    finally:
+        matcher.reset_recipe_index()
+
+
+def test_round_trip(recipes, store):
+    assert len(store) == len(recipes)
+    assert list(store.recipes) == recipes
+
+
+@pytest.mark.parametrize('pantry', PANTRIES)
+@pytest.mark.parametrize('backend', ['python', 'vector'])
+def test_store_ranks_like_json(recipes, store, pantry, backend):
+    expected = _ranking(RecipeIndex(recipes), pantry)
+    assert expected
+    assert _ranking(RecipeIndex.from_store(store), pantry, backend=backend) == expected
+
+
+def test_substitute_blocks(recipes, store):
+    assert RecipeIndex.from_store(store).substitute_blocks() == RecipeIndex(recipes).substitute_blocks()
+
+
+def test_recipe_substitutes(recipes, store):
+    assert store.recipe_substitutes() == matcher.build_substitute_lookup({}, recipes)
@@ -0,0 +1,58 @@
+"""Incremental parsing of streamed AI responses (RecipeStreamParser)"""
+
+import json
+
+import pytest
+
+from utils.ai_helper import RecipeStreamParser
+
+RECIPES = [
+    {'name': 'Brace {Stew}', 'instructions': ['Say "hi" [twice]', 'Back\\slash \\"quoted\\" }]'],
+     'ingredients': {'mandatory': [{'name': 'egg'}], 'optional': []}},
+    {'name': 'Unicode éè ☃', 'tags': [], 'nested': {'deep': [[{}], {'a': '}'}]}},
+    {'name': 'Plain', 'servings': 2}
+]
+
+RESPONSES = [
+    json.dumps({'recipes': RECIPES}),
+    json.dumps(RECIPES, indent=2),
+    'Here you go: "quoted" preamble\n```json\n' + json.dumps({'recipes': RECIPES}) + '\n```\nEnjoy!',
+    json.dumps({'recipes': RECIPES}, ensure_ascii=True)
+]
+
+
+def _parse(chunks):
+    parser = RecipeStreamParser()
+    return [recipe for chunk in chunks for recipe in parser.feed(chunk)]
+
+
+@pytest.mark.parametrize('response', RESPONSES)
+def test_whole_response(response):
+    assert _parse([response]) == RECIPES
+
+
+@pytest.mark.parametrize('response', RESPONSES)
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64])
+def test_split_at_every_boundary(response, size):
+    # Chunks of one or two characters split every string and escape sequence
+    chunks = [response[i:i + size] for i in range(0, len(response), size)]
+    assert _parse(chunks) == RECIPES
+
+
+@pytest.mark.parametrize('response', RESPONSES)
+def test_every_two_chunk_split(response):
+    for i in range(len(response) + 1):
+        assert _parse([response[:i], response[i:]]) == RECIPES
+
+
+def test_recipes_are_returned_as_soon_as_they_close():
+    response = json.dumps({'recipes': RECIPES})
+    first_end = response.index(json.dumps(RECIPES[1])) - 2
+    parser = RecipeStreamParser()
+    assert parser.feed(response[:first_end + 1]) == RECIPES[:1]
+    assert parser.feed(response[first_end + 1:]) == RECIPES[1:]
+
+
+def test_malformed_recipe_is_skipped():
+    response = '{"recipes": [{"name": "Bad", "servings": }, ' + json.dumps(RECIPES[2]) + ']}'
+    assert _parse([response[:20], response[20:]]) == [RECIPES[2]]
@@ -0,0 +1,197 @@
+"""Request coalescing and model call limits (utils.throttle)"""
+
+import threading
+import time
+
+import pytest
+
+from utils import ai_helper
+from utils.throttle import ConcurrencyLimiter, FlightAbandoned, RateLimiter, SingleFlight
+
+FOLLOWERS = 8
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def _followers(flights, key, count):
+    flight = flights._flights.get(key)
+    return flight is not None and flight.followers == count
+
+
+def _start(target, results, count):
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def produce():
+        calls.append(1)
+        gate.wait(5)
+        yield from [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]
+
+    results = []
+    threads = _start(lambda: list(flights.run('key', produce, timeout=5)), results, FOLLOWERS + 1)
+    _wait_until(lambda: _followers(flights, 'key', FOLLOWERS))
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [[{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]] * (FOLLOWERS + 1)
+    assert len(flights) == 0
+
+
+def test_followers_get_their_own_copies():
+    flights = SingleFlight()
+    gate = threading.Event()
+
+    def produce():
+        gate.wait(5)
+        yield {'name': 'a'}
+
+    results = []
+    threads = _start(lambda: list(flights.run('key', produce, 5, dict)), results, 3)
+    _wait_until(lambda: _followers(flights, 'key', 2))
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+    items = [result[0] for result in results]
+    assert len({id(item) for item in items}) == 3
+
+
+def test_abandoned_flight_is_rerun_once_for_all_followers():
+    flights = SingleFlight()
+    calls = []
+    rerun = threading.Event()
+
+    def produce():
+        calls.append(1)
+        if len(calls) > 1:
+            rerun.wait(5)
+        yield from ['a', 'b', 'c']
+
+    def follow():
+        received = []
+        while True:
+            try:
+                for item in flights.run('key', produce, timeout=5):
+                    received.append(item)
+                return received
+            except FlightAbandoned:
+                received.append('abandoned')
+
+    leader = flights.run('key', produce)
+    assert next(leader) == 'a'
+    results = []
+    threads = _start(follow, results, FOLLOWERS)
+    _wait_until(lambda: _followers(flights, 'key', FOLLOWERS))
+    # The leader's caller stops reading
+    leader.close()
+    _wait_until(lambda: _followers(flights, 'key', FOLLOWERS - 1))
+    rerun.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 2
+    assert results == [['a', 'abandoned', 'a', 'b', 'c']] * FOLLOWERS
+
+
+def test_quiet_leader_times_out_followers():
+    flights = SingleFlight()
+    calls = []
+
+    def produce():
+        calls.append(1)
+        yield 'a'
+        yield 'b'
+
+    leader = flights.run('key', produce)
+    assert next(leader) == 'a'
+    received = []
+    started = time.monotonic()
+    with pytest.raises(FlightAbandoned, match="No result"):
+        for item in flights.run('key', produce, timeout=0.1):
+            received.append(item)
+    assert received == ['a']
+    assert time.monotonic() - started < 2
+    # The stalled flight is dropped, so the next caller leads a new one
+    assert len(flights) == 0
+    assert list(flights.run('key', produce)) == ['a', 'b']
+    assert len(calls) == 2
+    leader.close()
+
+
+def test_coalesced_generation_skips_recipes_already_received():
+    calls = []
+    rerun = threading.Event()
+
+    def generate():
+        calls.append(1)
+        if len(calls) > 1:
+            rerun.wait(5)
+        yield from [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]
+
+    key = 'test-coalesced-fallback'
+    leader = ai_helper._coalesced(key, generate, 3)
+    assert next(leader) == {'name': 'a'}
+    results = []
+    threads = _start(lambda: list(ai_helper._coalesced(key, generate, 3)), results, FOLLOWERS)
+    _wait_until(lambda: _followers(ai_helper._flights, key, FOLLOWERS))
+    leader.close()
+    _wait_until(lambda: _followers(ai_helper._flights, key, FOLLOWERS - 1))
+    rerun.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 2
+    assert results == [[{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]] * FOLLOWERS
+
+
+def test_rate_limiter_times_out():
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.acquire(timeout=0)
+    started = time.monotonic()
+    # The next token is a second away, so a shorter wait gives up at once
+    assert not limiter.acquire(timeout=0.1)
+    assert time.monotonic() - started < 0.1
+    assert limiter.acquire(timeout=1.5)
+
+
+def test_rate_limiter_allows_bursts():
+    limiter = RateLimiter(rate=1, burst=3)
+    assert all(limiter.acquire(timeout=0) for _ in range(3))
+    assert not limiter.acquire(timeout=0)
+
+
+def test_disabled_rate_limiter():
+    limiter = RateLimiter(rate=0)
+    assert all(limiter.acquire(timeout=0) for _ in range(100))
+
+
+def test_concurrency_limiter_times_out():
+    limiter = ConcurrencyLimiter(1)
+    assert limiter.acquire(timeout=0.05)
+    assert limiter.in_flight == 1
+    assert not limiter.acquire(timeout=0.05)
+    limiter.release()
+    assert limiter.in_flight == 0
+    assert limiter.acquire(timeout=0.05)
+    limiter.release()
+
+
+def test_unlimited_concurrency():
+    limiter = ConcurrencyLimiter(0)
+    assert all(limiter.acquire(timeout=0) for _ in range(100))
+    assert limiter.in_flight == 100
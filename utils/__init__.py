@@ -1,25 +1,61 @@
 """
 DishGPT Utilities Package
 Contains helper modules for recipe matching, ingredient normalization, and AI integration
+
+Names are imported from their submodule on first access, so `import utils`
+is nearly free and the AI stack (ai_helper, google.generativeai, dotenv)
+is only loaded by code that actually generates recipes.
 """
 
-from .normalizer import normalize_ingredient, normalize_ingredient_list
-from .matcher import (
-    load_recipes,
-    load_substitutes,
-    find_matching_recipes,
-    get_substitutes_for_ingredient,
-    calculate_match_score
-)
-from .ai_helper import generate_ai_recipes
-
-__all__ = [
-    'normalize_ingredient',
-    'normalize_ingredient_list',
-    'load_recipes',
-    'load_substitutes',
-    'find_matching_recipes',
-    'get_substitutes_for_ingredient',
-    'calculate_match_score',
-    'generate_ai_recipes'
-]
\ No newline at end of file
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    'normalize_ingredient': 'normalizer',
+    'normalize_ingredient_list': 'normalizer',
+    'normalize_ingredient_batch': 'normalizer',
+    'normalize_cache_info': 'normalizer',
+    'clear_normalize_cache': 'normalizer',
+    'load_recipes': 'matcher',
+    'load_substitutes': 'matcher',
+    'find_matching_recipes': 'matcher',
+    'find_matching_recipes_batch': 'matcher',
+    'match_recipes': 'matcher',
+    'resolve_ingredients': 'matcher',
+    'get_ingredient_resolver': 'matcher',
+    'get_substitutes_for_ingredient': 'matcher',
+    'get_substitutes_for_ingredients': 'matcher',
+    'calculate_match_score': 'matcher',
+    'RecipeIndex': 'matcher',
+    'load_recipe_index': 'matcher',
+    'get_recipe_index': 'matcher',
+    'get_recipe_database': 'matcher',
+    'set_recipe_index': 'matcher',
+    'reset_recipe_index': 'matcher',
+    'result_cache_info': 'matcher',
+    'clear_result_cache': 'matcher',
+    'warm_up': 'matcher',
+    'SubstituteStore': 'matcher',
+    'get_substitute_store': 'matcher',
+    'Recipe': 'records',
+    'Ingredient': 'records',
+    'MatchInfo': 'records',
+    'as_dict': 'records',
+    'MatchSession': 'session',
+    'generate_ai_recipes': 'ai_helper'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,63 +1,410 @@
+import copy
+import hashlib
+import importlib.util
 import json
+import logging
 import os
-from typing import List, Dict, Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Iterator, Optional
 from dotenv import load_dotenv
+from utils.cache import DiskCache
+from utils.metrics import increment, observe, timed, timer
+from utils.normalizer import normalize_ingredient_list
+from utils.providers import ModelProvider, FakeProvider
+from utils.throttle import ConcurrencyLimiter, FlightAbandoned, RateLimiter, SingleFlight
 
 # Load environment variables
 load_dotenv()
 
-# Try to import Google Gemini
+logger = logging.getLogger(__name__)
+
+# Persistent cache for generated recipes
+AI_CACHE_PATH = os.getenv('DISHGPT_AI_CACHE_PATH', os.path.join('.cache', 'ai_recipes.sqlite3'))
+AI_CACHE_TTL = 7 * 24 * 3600  # One week
+AI_CACHE_MAX_ENTRIES = 5000
+
+# Limits on calls to the model, shared by every request in the process
+AI_MAX_CONCURRENT = int(os.getenv('DISHGPT_AI_CONCURRENCY', '4'))
+AI_RATE_PER_MINUTE = float(os.getenv('DISHGPT_AI_RATE_PER_MINUTE', '60'))
+AI_RATE_BURST = int(os.getenv('DISHGPT_AI_RATE_BURST', '5'))
+# Seconds a request waits for a free slot and a rate token before giving up
+AI_QUEUE_TIMEOUT = float(os.getenv('DISHGPT_AI_QUEUE_TIMEOUT', '10'))
+# Seconds a request joined to an identical generation waits for its next
+# recipe before generating on its own (covers the leader's queue wait)
+AI_FOLLOW_TIMEOUT = float(os.getenv('DISHGPT_AI_FOLLOW_TIMEOUT', '30'))
+
+# Google Gemini takes about a second to import, so it is only imported
+# when the first Gemini model is built
 try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
+    # find_spec imports the parent package, so a missing 'google' raises
+    GEMINI_AVAILABLE = importlib.util.find_spec('google.generativeai') is not None
+except (ImportError, ValueError):
     GEMINI_AVAILABLE = False
-    print("⚠️ Google Generative AI not installed. Run: pip install google-generativeai")
+if not GEMINI_AVAILABLE:
+    logger.warning("Google Generative AI not installed. Run: pip install google-generativeai")
 
 
-def initialize_gemini():
-    """Initialize Gemini AI with API key"""
-    if not GEMINI_AVAILABLE:
-        print("❌ Gemini library not available")
-        return None
+# Model names to try, in order of preference
+GEMINI_MODEL_NAMES = [
+    'gemini-pro',           # Standard Gemini Pro
+    'models/gemini-pro',    # With models/ prefix
+    'gemini-1.0-pro'        # Alternative name
+]
+
+# Backoff between failed model initializations (seconds)
+MODEL_INIT_BACKOFF = 5
+MODEL_INIT_BACKOFF_MAX = 300
+
+
+class GeminiProvider(ModelProvider):
+    """Google Gemini, configured from GEMINI_API_KEY"""
     
-    api_key = os.getenv('GEMINI_API_KEY')
-    if not api_key:
-        print("❌ GEMINI_API_KEY not found in .env file")
-        return None
+    name = 'gemini'
     
-    try:
-        genai.configure(api_key=api_key)
-        # Try multiple model names in order of preference
-        model_names = [
-            'gemini-pro',           # Standard Gemini Pro
-            'models/gemini-pro',    # With models/ prefix
-            'gemini-1.0-pro'        # Alternative name
-        ]
+    def create_model(self, model_names):
+        """Configure Gemini and build the first model that loads"""
+        if not GEMINI_AVAILABLE:
+            return None, None, "Gemini library not available"
         
-        model = None
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            return None, None, "GEMINI_API_KEY not found in .env file"
+        
+        try:
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+        except Exception as e:
+            return None, None, f"Gemini initialization error: {e}"
+        
+        error = "Could not initialize any Gemini model"
         for model_name in model_names:
             try:
-                model = genai.GenerativeModel(model_name)
-                print(f"✅ Gemini initialized successfully with model: {model_name}")
-                return model
+                return genai.GenerativeModel(model_name), model_name, None
             except Exception as e:
-                print(f"⚠️ Failed to load {model_name}: {e}")
-                continue
+                error = f"Failed to load {model_name}: {e}"
+        
+        return None, None, error
+
+
+_model_provider = None
+
+
+def get_model_provider() -> ModelProvider:
+    """
+    Return the active model provider
+    
+    Defaults to Gemini; set DISHGPT_MODEL_PROVIDER=fake to use the offline
+    FakeProvider (configured by its DISHGPT_FAKE_* variables).
+    """
+    global _model_provider
+    
+    if _model_provider is None:
+        if os.getenv('DISHGPT_MODEL_PROVIDER', 'gemini').lower() == 'fake':
+            _model_provider = FakeProvider.from_env()
+        else:
+            _model_provider = GeminiProvider()
+    
+    return _model_provider
+
+
+def set_model_provider(provider: ModelProvider):
+    """Switch to another model provider; the shared model is rebuilt on next use"""
+    global _model_provider
+    
+    _model_provider = provider
+    get_model_handle().reset()
+
+
+def initialize_gemini():
+    """Initialize Gemini AI with API key"""
+    model, model_name, error = get_model_provider().create_model(GEMINI_MODEL_NAMES)
+    
+    if model:
+        logger.info("Gemini initialized successfully with model: %s", model_name)
+    else:
+        logger.error("%s", error)
+    
+    return model
+
+
+class ModelHandle:
+    """
+    Process-wide, lazily initialized AI model
+    
+    The model is built on first use and then shared by every request. The
+    name that worked is tried first on any later re-initialization. After a
+    failed initialization further attempts are skipped until an exponential
+    backoff has elapsed, so requests don't each pay for a doomed retry.
+    
+    Args:
+        factory: Callable taking a list of model names and returning
+            (model, model_name, error). Defaults to the active provider's
+            create_model.
+        model_names (list): Model names to try, in order of preference
+    """
+    
+    def __init__(self, factory=None, model_names=None):
+        self.factory = factory
+        self.model_names = list(model_names or GEMINI_MODEL_NAMES)
+        self._lock = threading.Lock()
+        self._model = None
+        self._retry_at = 0.0
+        self.model_name = None
+        self.state = 'uninitialized'
+        self.initialized_at = None
+        self.init_seconds = None
+        self.init_attempts = 0
+        self.init_failures = 0
+        self.last_error = None
+        self.calls_served = 0
+        self.call_errors = 0
+    
+    def get(self):
+        """Return the shared model, initializing it if needed (None if unavailable)"""
+        if self._model is not None:
+            return self._model
         
-        if not model:
-            print("❌ Could not initialize any Gemini model")
-            return None
+        with self._lock:
+            if self._model is not None:
+                return self._model
             
-    except Exception as e:
-        print(f"❌ Gemini initialization error: {e}")
-        return None
+            if time.monotonic() < self._retry_at:
+                return None
+            
+            # Remembered model name first
+            names = self.model_names
+            if self.model_name in names:
+                names = [self.model_name] + [n for n in names if n != self.model_name]
+            
+            started = time.perf_counter()
+            factory = self.factory or get_model_provider().create_model
+            model, model_name, error = factory(names)
+            self.init_seconds = time.perf_counter() - started
+            self.init_attempts += 1
+            
+            if model is None:
+                self.init_failures += 1
+                self.last_error = error
+                self.state = 'backoff'
+                delay = min(MODEL_INIT_BACKOFF_MAX, MODEL_INIT_BACKOFF * 2 ** (self.init_failures - 1))
+                self._retry_at = time.monotonic() + delay
+                logger.error("%s (retrying in %ss)", error, delay)
+                return None
+            
+            self._model = model
+            self.model_name = model_name
+            self.state = 'ready'
+            self.initialized_at = time.time()
+            self.init_failures = 0
+            logger.info("AI model initialized successfully: %s", model_name)
+            return model
+    
+    def record_call(self, error=None):
+        """Count one request served by the model (and its error, if any)"""
+        with self._lock:
+            self.calls_served += 1
+            if error is not None:
+                self.call_errors += 1
+                self.last_error = str(error)
+    
+    def reset(self):
+        """Forget the model and any backoff, e.g. after rotating the API key"""
+        with self._lock:
+            self._model = None
+            self._retry_at = 0.0
+            self.init_failures = 0
+            self.state = 'uninitialized'
+    
+    def stats(self):
+        """
+        Lifecycle information for the shared model
+        
+        Returns:
+            dict: state, model_name, initialized_at, init_seconds,
+                init_attempts, init_failures, retry_in, last_error,
+                calls_served, call_errors
+        """
+        with self._lock:
+            return {
+                'state': self.state,
+                'model_name': self.model_name,
+                'initialized_at': self.initialized_at,
+                'init_seconds': self.init_seconds,
+                'init_attempts': self.init_attempts,
+                'init_failures': self.init_failures,
+                'retry_in': max(0.0, self._retry_at - time.monotonic()) if self.state == 'backoff' else 0.0,
+                'last_error': self.last_error,
+                'calls_served': self.calls_served,
+                'call_errors': self.call_errors
+            }
 
 
-def generate_ai_recipes(
+_model_handle = ModelHandle()
+
+
+def get_model_handle() -> ModelHandle:
+    """Return the process-wide Gemini model handle"""
+    return _model_handle
+
+
+# Concurrent identical requests share one generation (see utils.throttle)
+_flights = SingleFlight()
+_model_concurrency = ConcurrencyLimiter(AI_MAX_CONCURRENT)
+_model_rate = RateLimiter(AI_RATE_PER_MINUTE / 60, AI_RATE_BURST)
+
+
+@contextmanager
+def _model_slot(timeout: float = AI_QUEUE_TIMEOUT):
+    """
+    Hold a model concurrency slot and a rate-limit token for one call
+    
+    Yields:
+        bool: False if they weren't available within `timeout` seconds; the
+            call must then be skipped
+    """
+    concurrency, rate = _model_concurrency, _model_rate
+    started = time.monotonic()
+    if not concurrency.acquire(timeout=timeout):
+        increment('ai_throttled')
+        yield False
+        return
+    try:
+        if not rate.acquire(timeout=max(0.0, timeout - (time.monotonic() - started))):
+            increment('ai_throttled')
+            yield False
+            return
+        observe('ai_queue_wait', time.monotonic() - started)
+        yield True
+    finally:
+        concurrency.release()
+
+
+def set_ai_limits(max_concurrent: int, rate_per_minute: float, burst: int = AI_RATE_BURST):
+    """
+    Replace the model call limits (0 turns a limit off)
+    
+    Calls already holding a slot finish under the old limits.
+    """
+    global _model_concurrency, _model_rate
+    _model_concurrency = ConcurrencyLimiter(max_concurrent)
+    _model_rate = RateLimiter(rate_per_minute / 60, burst)
+
+
+def _coalesced(cache_key: str, generate, num_recipes: int) -> Iterator[Dict]:
+    """
+    Run `generate()` once for all concurrent requests with the same key
+    
+    The first request (the leader) runs it; requests arriving while it is in
+    flight follow along and receive copies of the same validated recipes, as
+    they are produced. If the leader stops early (its caller stopped
+    reading) or produces nothing for AI_FOLLOW_TIMEOUT seconds, its followers
+    start over together (see SingleFlight.run) for the recipes they are
+    still missing.
+    """
+    received = []
+    while True:
+        # Recipes already received from an abandoned flight aren't repeated
+        earlier = set(received)
+        try:
+            for recipe in _flights.run(cache_key, generate, AI_FOLLOW_TIMEOUT, copy.deepcopy,
+                                       on_follow=lambda: increment('ai_requests_coalesced')):
+                name = recipe.get('name')
+                if len(received) < num_recipes and name not in earlier:
+                    received.append(name)
+                    yield recipe
+            return
+        except FlightAbandoned as e:
+            increment('ai_coalesce_fallbacks')
+            logger.warning("In-flight AI generation abandoned (%s); joining a new one", e)
+
+
+def ai_limits_status() -> Dict:
+    """
+    Current state of the model call limits
+    
+    Returns:
+        dict: in_flight_generations, model_calls_in_progress,
+            max_concurrent, rate_per_minute
+    """
+    return {
+        'in_flight_generations': len(_flights),
+        'model_calls_in_progress': _model_concurrency.in_flight,
+        'max_concurrent': _model_concurrency.limit,
+        'rate_per_minute': _model_rate.rate * 60
+    }
+
+
+_ai_cache = None
+_ai_cache_lock = threading.Lock()
+
+
+def get_ai_cache() -> Optional[DiskCache]:
+    """Return the persistent AI recipe cache, or None if it can't be opened"""
+    global _ai_cache
+    
+    if _ai_cache is None:
+        with _ai_cache_lock:
+            if _ai_cache is None:
+                try:
+                    _ai_cache = DiskCache(AI_CACHE_PATH, ttl=AI_CACHE_TTL, max_entries=AI_CACHE_MAX_ENTRIES)
+                except Exception as e:
+                    logger.warning("AI recipe cache disabled: %s", e)
+                    _ai_cache = False
+    
+    return _ai_cache or None
+
+
+def set_ai_cache(cache: Optional[DiskCache]):
+    """Use `cache` as the AI recipe cache (None disables caching)"""
+    global _ai_cache
+    
+    with _ai_cache_lock:
+        _ai_cache = cache if cache is not None else False
+
+
+def ai_cache_key(
     user_ingredients: List[str],
     dietary_filter: Optional[str] = None,
     num_recipes: int = 2
+) -> str:
+    """
+    Cache key for an AI generation request
+    
+    Ingredient order and spelling variants don't matter. The rendered prompt
+    is hashed in as well, so editing create_recipe_prompt invalidates
+    every cached entry.
+    """
+    ingredients = sorted(normalize_ingredient_list(user_ingredients))
+    prompt = create_recipe_prompt(ingredients, dietary_filter, num_recipes)
+    
+    payload = json.dumps({
+        'ingredients': ingredients,
+        'dietary_filter': dietary_filter,
+        'num_recipes': num_recipes,
+        'prompt': hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _cached_recipes(cache: DiskCache, cache_key: str, num_recipes: int) -> List[Dict]:
+    """Valid cached recipes for a request, or [] on a miss"""
+    cached = cache.get(cache_key) or []
+    cached = [recipe for recipe in cached if validate_recipe(recipe)]
+    if cached:
+        increment('ai_cache_hits')
+        logger.debug("Using %d cached AI recipe(s)", len(cached))
+    else:
+        increment('ai_cache_misses')
+    return cached[:num_recipes]
+
+
+def generate_ai_recipes(
+    user_ingredients: List[str],
+    dietary_filter: Optional[str] = None,
+    num_recipes: int = 2,
+    use_cache: bool = True
 ) -> List[Dict]:
     """
     Generate recipes using Google Gemini AI
@@ -66,57 +413,208 @@ def generate_ai_recipes(
         user_ingredients: List of ingredients the user has
         dietary_filter: 'veg' or 'non-veg' or None
         num_recipes: Number of recipes to generate
+        use_cache: Serve and store results in the persistent AI cache
         
     Returns:
         List of recipe dictionaries
     """
     
-    print(f"\n🤖 AI Recipe Generation Started")
-    print(f"   Ingredients: {user_ingredients}")
-    print(f"   Dietary Filter: {dietary_filter}")
+    increment('ai_requests')
+    logger.debug("AI recipe generation started: ingredients=%s, dietary_filter=%s",
+                 user_ingredients, dietary_filter)
     
-    # Initialize Gemini
-    model = initialize_gemini()
+    # Identical requests are answered from disk without calling Gemini
+    cache = get_ai_cache() if use_cache else None
+    cache_key = ai_cache_key(user_ingredients, dietary_filter, num_recipes)
+    if cache:
+        cached = _cached_recipes(cache, cache_key, num_recipes)
+        if cached:
+            return cached
+    
+    # ... and identical requests already running are joined, not repeated
+    return list(_coalesced(
+        cache_key,
+        lambda: _generate(user_ingredients, dietary_filter, num_recipes, cache, cache_key),
+        num_recipes
+    ))
+
+
+def _generate(
+    user_ingredients: List[str],
+    dietary_filter: Optional[str],
+    num_recipes: int,
+    cache: Optional[DiskCache],
+    cache_key: str
+) -> List[Dict]:
+    """generate_ai_recipes past the cache: one call to the model"""
+    # Shared model, initialized once per process
+    handle = get_model_handle()
+    model = handle.get()
     
     if not model:
-        print("❌ AI model not available - skipping AI generation")
+        logger.warning("AI model not available - skipping AI generation")
         return []
     
     # Create prompt
     prompt = create_recipe_prompt(user_ingredients, dietary_filter, num_recipes)
     
-    print(f"📝 Sending prompt to AI...")
+    logger.debug("Sending prompt to AI")
     
     try:
         # Call Gemini API
-        response = model.generate_content(prompt)
+        with _model_slot() as admitted:
+            if not admitted:
+                logger.warning("AI model busy - skipping AI generation")
+                return []
+            try:
+                with timer('ai_model_call'):
+                    response = model.generate_content(prompt)
+            except Exception as e:
+                increment('ai_model_errors')
+                handle.record_call(error=e)
+                raise
+            handle.record_call()
         
-        print(f"✅ AI Response received!")
-        print(f"   Raw response length: {len(response.text)} characters")
+        logger.debug("AI response received: %d characters", len(response.text))
         
         # Parse response
         recipes = parse_ai_response(response.text)
         
-        print(f"📊 Parsed {len(recipes)} recipes from AI response")
+        logger.debug("Parsed %d recipes from AI response", len(recipes))
         
         # Validate recipes
         valid_recipes = []
         for i, recipe in enumerate(recipes):
             if validate_recipe(recipe):
-                print(f"   ✅ Recipe {i+1}: {recipe.get('name', 'Unknown')} - Valid")
+                logger.debug("Recipe %d: %s - valid", i + 1, recipe.get('name', 'Unknown'))
                 valid_recipes.append(recipe)
             else:
-                print(f"   ❌ Recipe {i+1}: Invalid structure")
+                increment('ai_recipes_invalid')
+                logger.debug("Recipe %d: invalid structure", i + 1)
         
-        return valid_recipes[:num_recipes]
+        valid_recipes = valid_recipes[:num_recipes]
+        increment('ai_recipes_generated', len(valid_recipes))
         
-    except Exception as e:
-        print(f"❌ AI generation error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        if cache and valid_recipes:
+            cache.put(cache_key, valid_recipes)
+        
+        return valid_recipes
+        
+    except Exception:
+        logger.exception("AI generation error")
         return []
 
 
+def stream_ai_recipes(
+    user_ingredients: List[str],
+    dietary_filter: Optional[str] = None,
+    num_recipes: int = 2,
+    use_cache: bool = True
+) -> Iterator[Dict]:
+    """
+    Generate recipes using Google Gemini AI, yielding each one as it arrives
+    
+    The response is streamed and fed to a RecipeStreamParser, so every recipe
+    is validated and yielded as soon as its JSON object closes instead of
+    after the whole generation finishes.
+    
+    Args:
+        user_ingredients: List of ingredients the user has
+        dietary_filter: 'veg' or 'non-veg' or None
+        num_recipes: Number of recipes to generate
+        use_cache: Serve and store results in the persistent AI cache
+        
+    Yields:
+        Valid recipe dictionaries, at most num_recipes of them
+    """
+    
+    increment('ai_requests')
+    logger.debug("AI recipe streaming started: ingredients=%s, dietary_filter=%s",
+                 user_ingredients, dietary_filter)
+    
+    cache = get_ai_cache() if use_cache else None
+    cache_key = ai_cache_key(user_ingredients, dietary_filter, num_recipes)
+    if cache:
+        cached = _cached_recipes(cache, cache_key, num_recipes)
+        if cached:
+            yield from cached
+            return
+    
+    yield from _coalesced(
+        cache_key,
+        lambda: _stream(user_ingredients, dietary_filter, num_recipes, cache, cache_key),
+        num_recipes
+    )
+
+
+def _stream(
+    user_ingredients: List[str],
+    dietary_filter: Optional[str],
+    num_recipes: int,
+    cache: Optional[DiskCache],
+    cache_key: str
+) -> Iterator[Dict]:
+    """stream_ai_recipes past the cache: one streamed call to the model"""
+    handle = get_model_handle()
+    model = handle.get()
+    
+    if not model:
+        logger.warning("AI model not available - skipping AI generation")
+        return
+    
+    prompt = create_recipe_prompt(user_ingredients, dietary_filter, num_recipes)
+    
+    logger.debug("Streaming prompt to AI")
+    
+    parser = RecipeStreamParser()
+    chunks = []
+    # Snapshots for the cache; callers may modify the recipes they receive
+    valid_recipes = []
+    # Time spent by the caller between yields is not the model's
+    suspended = 0.0
+    
+    try:
+        with _model_slot() as admitted:
+            if not admitted:
+                logger.warning("AI model busy - skipping AI generation")
+                return
+            started = time.perf_counter()
+            try:
+                response = model.generate_content(prompt, stream=True)
+                for chunk in response:
+                    chunks.append(chunk.text)
+                    for recipe in parser.feed(chunk.text):
+                        if len(valid_recipes) < num_recipes and validate_recipe(recipe):
+                            logger.debug("Streamed recipe: %s", recipe.get('name', 'Unknown'))
+                            valid_recipes.append(copy.deepcopy(recipe))
+                            yielded_at = time.perf_counter()
+                            yield recipe
+                            suspended += time.perf_counter() - yielded_at
+            except Exception as e:
+                increment('ai_model_errors')
+                handle.record_call(error=e)
+                raise
+            handle.record_call()
+            observe('ai_model_stream', time.perf_counter() - started - suspended)
+        
+        # Nothing usable came out incrementally: try the whole response
+        if not valid_recipes:
+            for recipe in parse_ai_response(''.join(chunks)):
+                if len(valid_recipes) < num_recipes and validate_recipe(recipe):
+                    valid_recipes.append(copy.deepcopy(recipe))
+                    yield recipe
+        
+        logger.debug("Streamed %d valid recipes", len(valid_recipes))
+        increment('ai_recipes_generated', len(valid_recipes))
+        
+        if cache and valid_recipes:
+            cache.put(cache_key, valid_recipes)
+        
+    except Exception:
+        logger.exception("AI streaming error")
+
+
+@timed('ai_prompt_build')
 def create_recipe_prompt(user_ingredients: List[str], dietary_filter: Optional[str] = None, num_recipes: int = 2) -> str:
     """
     Create optimized prompt for AI recipe generation
@@ -180,6 +678,7 @@ Generate {num_recipes} complete recipes now:"""
     return prompt
 
 
+@timed('ai_parse')
 def parse_ai_response(response_text: str) -> List[Dict]:
     """
     Parse AI response and extract recipes
@@ -189,16 +688,16 @@ def parse_ai_response(response_text: str) -> List[Dict]:
         # Clean the response
         text = response_text.strip()
         
-        print(f"🔍 Parsing AI response...")
-        print(f"   First 200 chars: {text[:200]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Parsing AI response, first 200 chars: %s", text[:200])
         
         # Remove markdown code blocks if present
         if '```json' in text:
             text = text.split('```json')[1].split('```')[0]
-            print(f"   Removed ```json markers")
+            logger.debug("Removed ```json markers")
         elif '```' in text:
             text = text.split('```')[1].split('```')[0]
-            print(f"   Removed ``` markers")
+            logger.debug("Removed ``` markers")
         
         text = text.strip()
         
@@ -207,30 +706,102 @@ def parse_ai_response(response_text: str) -> List[Dict]:
         end_idx = text.rfind('}') + 1
         
         if start_idx == -1 or end_idx == 0:
-            print(f"❌ No JSON found in response")
+            logger.warning("No JSON found in AI response")
             return []
         
         json_str = text[start_idx:end_idx]
         
-        print(f"   Extracted JSON length: {len(json_str)} chars")
+        logger.debug("Extracted JSON length: %d chars", len(json_str))
         
         # Parse JSON
         data = json.loads(json_str)
         
         recipes = data.get('recipes', [])
-        print(f"   Found {len(recipes)} recipes in JSON")
+        logger.debug("Found %d recipes in JSON", len(recipes))
         
         return recipes
         
     except json.JSONDecodeError as e:
-        print(f"❌ JSON parse error: {e}")
-        print(f"   Failed to parse: {text[:500]}")
+        logger.warning("JSON parse error: %s", e)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Failed to parse: %s", text[:500])
         return []
     except Exception as e:
-        print(f"❌ Parse error: {e}")
+        logger.warning("Parse error: %s", e)
         return []
 
 
+class RecipeStreamParser:
+    """
+    Incremental parser for streamed AI responses
+    
+    Feed it text as it arrives; it returns every recipe object whose JSON has
+    fully closed. Recipes are the objects directly inside the top-level
+    array, i.e. {"recipes": [{...}, {...}]} or a bare [{...}, {...}].
+    Markdown fences and other text outside the JSON are skipped, and text
+    before the recipe currently being read is discarded.
+    """
+    
+    def __init__(self):
+        self._buffer = ''
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._start = None
+    
+    def _at_recipe_level(self):
+        return self._stack == ['{', '['] or self._stack == ['[']
+    
+    def feed(self, text: str) -> List[Dict]:
+        """
+        Add streamed text
+        
+        Returns:
+            List of recipes completed by this text
+        """
+        scanned = len(self._buffer)
+        buffer = self._buffer + text
+        recipes = []
+        
+        for i in range(scanned, len(buffer)):
+            char = buffer[i]
+            
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                # Quotes outside the JSON (e.g. in a preamble) are not strings
+                self._in_string = bool(self._stack)
+            elif char in '{[':
+                if char == '{' and self._at_recipe_level():
+                    self._start = i
+                self._stack.append(char)
+            elif char in '}]' and self._stack:
+                self._stack.pop()
+                if char == '}' and self._start is not None and self._at_recipe_level():
+                    try:
+                        recipe = json.loads(buffer[self._start:i + 1])
+                        if isinstance(recipe, dict):
+                            recipes.append(recipe)
+                    except json.JSONDecodeError:
+                        pass
+                    self._start = None
+        
+        # Only the recipe still being read needs to be kept
+        if self._start is None:
+            self._buffer = ''
+        else:
+            self._buffer = buffer[self._start:]
+            self._start = 0
+        
+        return recipes
+
+
+@timed('ai_validate')
 def validate_recipe(recipe: Dict) -> bool:
     """
     Validate that a recipe has all required fields
@@ -241,22 +812,22 @@ def validate_recipe(recipe: Dict) -> bool:
     # Check all required fields exist
     for field in required_fields:
         if field not in recipe:
-            print(f"   Missing field: {field}")
+            logger.debug("Invalid recipe: missing field %s", field)
             return False
     
     # Check ingredients structure
     if 'mandatory' not in recipe.get('ingredients', {}):
-        print(f"   Missing mandatory ingredients")
+        logger.debug("Invalid recipe: missing mandatory ingredients")
         return False
     
     # Check instructions is a list
     if not isinstance(recipe.get('instructions'), list):
-        print(f"   Instructions not a list")
+        logger.debug("Invalid recipe: instructions not a list")
         return False
     
     # Check recipe type is valid
     if recipe.get('type') not in ['veg', 'non-veg']:
-        print(f"   Invalid type: {recipe.get('type')}")
+        logger.debug("Invalid recipe: invalid type %s", recipe.get('type'))
         return False
     
     return True
\ No newline at end of file
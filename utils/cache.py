@@ -0,0 +1,230 @@
+"""
+Small caching helpers shared by the matcher and the AI helper
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with an optional time-to-live
+
+    Args:
+        maxsize (int): Maximum number of entries kept
+        ttl (float): Seconds an entry stays valid (None for no expiry)
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store `value` under `key`, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard_if(self, predicate):
+        """Drop the entries whose key satisfies `predicate`"""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop every entry (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Cache statistics
+
+        Returns:
+            dict: hits, misses, hit_ratio, size, maxsize, evictions, expirations
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+class DiskCache:
+    """
+    Persistent JSON value cache stored in a SQLite file
+
+    Entries older than `ttl` are treated as missing, and once the cache holds
+    more than `max_entries` the least recently read entries are evicted.
+    Storage errors never propagate: a broken cache behaves like an empty one.
+
+    Args:
+        path (str): SQLite file (parent directories are created)
+        ttl (float): Seconds an entry stays valid (None for no expiry)
+        max_entries (int): Maximum number of entries kept
+    """
+
+    def __init__(self, path, ttl=None, max_entries=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)')
+
+    @contextmanager
+    def _connection(self):
+        # One short-lived connection per operation keeps this usable from any thread
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` if missing or expired"""
+        with self._lock:
+            try:
+                with self._connection() as conn:
+                    row = conn.execute(
+                        'SELECT value, created_at FROM entries WHERE key = ?', (key,)
+                    ).fetchone()
+
+                    if row is None:
+                        self.misses += 1
+                        return default
+
+                    value, created_at = row
+                    now = time.time()
+                    if self.ttl is not None and now - created_at > self.ttl:
+                        conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                        self.expirations += 1
+                        self.misses += 1
+                        return default
+
+                    conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+                value = json.loads(value)
+            except (sqlite3.Error, ValueError):
+                self.errors += 1
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a JSON-serializable `value` under `key`"""
+        with self._lock:
+            try:
+                now = time.time()
+                with self._connection() as conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) '
+                        'VALUES (?, ?, ?, ?)',
+                        (key, json.dumps(value), now, now)
+                    )
+
+                    excess = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+                    if excess > 0:
+                        conn.execute(
+                            'DELETE FROM entries WHERE key IN '
+                            '(SELECT key FROM entries ORDER BY accessed_at LIMIT ?)',
+                            (excess,)
+                        )
+                        self.evictions += excess
+            except (sqlite3.Error, TypeError, ValueError):
+                self.errors += 1
+
+    def clear(self):
+        """Drop every entry (statistics are kept)"""
+        with self._lock:
+            try:
+                with self._connection() as conn:
+                    conn.execute('DELETE FROM entries')
+            except sqlite3.Error:
+                self.errors += 1
+
+    def stats(self):
+        """
+        Cache statistics
+
+        Returns:
+            dict: hits, misses, hit_ratio, size, max_entries, evictions,
+                expirations, errors
+        """
+        with self._lock:
+            try:
+                with self._connection() as conn:
+                    size = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            except sqlite3.Error:
+                size = 0
+
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'size': size,
+                'max_entries': self.max_entries,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'errors': self.errors
+            }
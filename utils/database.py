@@ -0,0 +1,312 @@
+"""
+SQLite recipe catalog
+
+An alternative to recipes.json / substitutes.json for catalogs that are
+edited often or are too big to parse on every load. Recipes keep their
+full JSON body for display, while what matching needs lives in normalized,
+indexed tables:
+
+    recipes             position, id, name, type, mandatory_count, body
+    ingredients         id, name (normalized, unique)
+    recipe_ingredients  recipe, ingredient, mandatory, ordinal, name as written
+    substitutes         ingredient as written, normalized, substitute, ordinal
+
+With backend='sql', find_matching_recipes asks the database for the
+recipes sharing an ingredient with the user (and of the requested type)
+through the ingredient and type indexes, scores only those, and reads the
+bodies of the recipes it returns.
+
+Usage:
+    python -m utils.database data/recipes.json data/substitutes.json data/recipes.sqlite3
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from utils.normalizer import normalize_ingredient
+
+DATABASE_PATH = 'data/recipes.sqlite3'
+
+# File extensions load_recipes / load_substitutes treat as a database
+DATABASE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS recipes ('
+    'position INTEGER PRIMARY KEY, id INTEGER, name TEXT NOT NULL, type TEXT, '
+    'mandatory_count INTEGER NOT NULL, body TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS recipes_type ON recipes (type)',
+    'CREATE INDEX IF NOT EXISTS recipes_always_makeable ON recipes (mandatory_count) WHERE mandatory_count = 0',
+
+    'CREATE TABLE IF NOT EXISTS ingredients (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)',
+
+    'CREATE TABLE IF NOT EXISTS recipe_ingredients ('
+    'recipe INTEGER NOT NULL REFERENCES recipes (position) ON DELETE CASCADE, '
+    'ingredient INTEGER NOT NULL REFERENCES ingredients (id), '
+    'mandatory INTEGER NOT NULL, ordinal INTEGER NOT NULL, name TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS recipe_ingredients_ingredient ON recipe_ingredients (ingredient, recipe)',
+    'CREATE INDEX IF NOT EXISTS recipe_ingredients_recipe ON recipe_ingredients (recipe)',
+
+    'CREATE TABLE IF NOT EXISTS substitutes ('
+    'ingredient TEXT NOT NULL, normalized TEXT NOT NULL, substitute TEXT NOT NULL, '
+    'ordinal INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS substitutes_normalized ON substitutes (normalized)'
+]
+
+
+def is_database_path(path):
+    """True if `path` names a recipe database rather than a JSON file"""
+    return str(path).lower().endswith(DATABASE_EXTENSIONS)
+
+
+class RecipeDatabase:
+    """
+    Recipe catalog in an SQLite file
+
+    Reads go through one connection per thread (and process); writes each
+    use their own short-lived connection and transaction.
+
+    Args:
+        path (str): Database file; created with the schema if missing
+        readonly (bool): Open an existing catalog for reading only; raises
+            FileNotFoundError if there is none
+    """
+
+    def __init__(self, path=DATABASE_PATH, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._local = threading.local()
+
+        if readonly:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No recipe database at {path}; create it with: python -m utils.database")
+            return
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        if self.readonly:
+            return sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, timeout=10)
+        return sqlite3.connect(self.path, timeout=10)
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute('PRAGMA foreign_keys = ON')
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _reader(self):
+        # Connections must not cross a fork, so worker processes open their own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return conn
+
+    def version(self):
+        """Changes whenever the database file is written"""
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def __len__(self):
+        return self._reader().execute('SELECT COUNT(*) FROM recipes').fetchone()[0]
+
+    # Writing
+
+    def add_recipes(self, recipes):
+        """
+        Append recipes to the catalog
+
+        Args:
+            recipes (iterable): Recipe dictionaries, as in recipes.json
+
+        Returns:
+            list: The position assigned to each recipe
+        """
+        positions = []
+        with self._transaction() as conn:
+            ingredient_ids = dict(conn.execute('SELECT name, id FROM ingredients'))
+
+            for recipe in recipes:
+                mandatory = recipe['ingredients']['mandatory']
+                optional = recipe['ingredients'].get('optional', [])
+                cursor = conn.execute(
+                    'INSERT INTO recipes (id, name, type, mandatory_count, body) VALUES (?, ?, ?, ?, ?)',
+                    (recipe.get('id'), recipe['name'], recipe.get('type'),
+                     len({normalize_ingredient(i['name']) for i in mandatory}),
+                     json.dumps(recipe, ensure_ascii=False))
+                )
+                position = cursor.lastrowid
+                positions.append(position)
+
+                rows = []
+                for is_mandatory, ingredients in ((1, mandatory), (0, optional)):
+                    for ordinal, ingredient in enumerate(ingredients):
+                        name = normalize_ingredient(ingredient['name'])
+                        if name not in ingredient_ids:
+                            ingredient_ids[name] = conn.execute(
+                                'INSERT INTO ingredients (name) VALUES (?)', (name,)
+                            ).lastrowid
+                        rows.append((position, ingredient_ids[name], is_mandatory, ordinal, ingredient['name']))
+                conn.executemany(
+                    'INSERT INTO recipe_ingredients (recipe, ingredient, mandatory, ordinal, name) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    rows
+                )
+        return positions
+
+    def delete_recipes(self, positions):
+        """Remove recipes (and their ingredient rows) by position"""
+        with self._transaction() as conn:
+            conn.executemany('DELETE FROM recipes WHERE position = ?', [(p,) for p in positions])
+
+    def set_substitutes(self, substitutes):
+        """Replace the global substitutes with an ingredient -> substitutes mapping"""
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM substitutes')
+            conn.executemany(
+                'INSERT INTO substitutes (ingredient, normalized, substitute, ordinal) VALUES (?, ?, ?, ?)',
+                [
+                    (ingredient, normalize_ingredient(ingredient), substitute, ordinal)
+                    for ingredient, options in substitutes.items()
+                    for ordinal, substitute in enumerate(options)
+                ]
+            )
+
+    def clear(self):
+        """Drop every recipe, ingredient and substitute"""
+        with self._transaction() as conn:
+            for table in ('recipe_ingredients', 'recipes', 'ingredients', 'substitutes'):
+                conn.execute(f'DELETE FROM {table}')
+
+    # Reading
+
+    def load_recipes(self):
+        """Every recipe, in catalog order"""
+        rows = self._reader().execute('SELECT body FROM recipes ORDER BY position')
+        return [json.loads(body) for body, in rows]
+
+    def load_substitutes(self):
+        """The global substitutes, as in substitutes.json"""
+        substitutes = {}
+        rows = self._reader().execute(
+            'SELECT ingredient, substitute FROM substitutes ORDER BY rowid'
+        )
+        for ingredient, substitute in rows:
+            substitutes.setdefault(ingredient, []).append(substitute)
+        return substitutes
+
+    def ingredient_names(self):
+        """Every normalized ingredient name in the catalog"""
+        return [name for name, in self._reader().execute('SELECT name FROM ingredients')]
+
+    def recipes(self, positions):
+        """
+        Full recipes for some positions
+
+        Returns:
+            dict: position -> recipe dictionary
+        """
+        positions = list(positions)
+        if not positions:
+            return {}
+        # One JSON array parameter, however many positions (SQLite caps bound variables)
+        rows = self._reader().execute(
+            'SELECT position, body FROM recipes WHERE position IN (SELECT value FROM json_each(?))',
+            (json.dumps(positions),)
+        )
+        return {position: json.loads(body) for position, body in rows}
+
+    def candidates(self, user_set, dietary_filter=None):
+        """
+        Ingredient sets of the recipes worth scoring
+
+        Only recipes sharing an ingredient with `user_set`, or with no
+        mandatory ingredients, are read, filtered by type in the same query.
+
+        Returns:
+            list: (position, mandatory, optional) tuples in catalog order,
+                with normalized ingredient frozensets
+        """
+        type_clause = 'AND r.type = ?' if dietary_filter else ''
+        query = f"""
+            WITH candidates (position) AS (
+                SELECT r.position FROM recipes r
+                WHERE r.position IN (
+                    SELECT ri.recipe FROM recipe_ingredients ri
+                    JOIN ingredients i ON i.id = ri.ingredient
+                    WHERE i.name IN (SELECT value FROM json_each(?))
+                ) {type_clause}
+                UNION
+                SELECT r.position FROM recipes r
+                WHERE r.mandatory_count = 0 {type_clause}
+            )
+            SELECT c.position, i.name, ri.mandatory
+            FROM candidates c
+            LEFT JOIN recipe_ingredients ri ON ri.recipe = c.position
+            LEFT JOIN ingredients i ON i.id = ri.ingredient
+            ORDER BY c.position, ri.mandatory DESC, ri.ordinal
+        """
+        # The names go in as one JSON array; the type clause appears in
+        # both halves of the union
+        parameters = [json.dumps(list(user_set), ensure_ascii=False)]
+        parameters += [dietary_filter, dietary_filter] if dietary_filter else []
+
+        grouped = {}
+        for position, name, mandatory in self._reader().execute(query, parameters):
+            kinds = grouped.setdefault(position, ([], []))
+            if name is not None:
+                kinds[0 if mandatory else 1].append(name)
+
+        return [
+            (position, frozenset(mandatory), frozenset(optional))
+            for position, (mandatory, optional) in grouped.items()
+        ]
+
+
+def import_json(recipes_path, substitutes_path, database_path=DATABASE_PATH):
+    """
+    Build a database from recipes.json and substitutes.json
+
+    Any existing catalog in the database is replaced.
+    """
+    with open(recipes_path, 'r', encoding='utf-8') as f:
+        recipes = json.load(f).get('recipes', [])
+    with open(substitutes_path, 'r', encoding='utf-8') as f:
+        substitutes = json.load(f).get('substitutes', {})
+
+    database = RecipeDatabase(database_path)
+    database.clear()
+    database.add_recipes(recipes)
+    database.set_substitutes(substitutes)
+    return database
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import recipes.json and substitutes.json into SQLite')
+    parser.add_argument('recipes', nargs='?', default='data/recipes.json')
+    parser.add_argument('substitutes', nargs='?', default='data/substitutes.json')
+    parser.add_argument('output', nargs='?', default=DATABASE_PATH)
+    args = parser.parse_args()
+
+    database = import_json(args.recipes, args.substitutes, args.output)
+    print(f"Imported {len(database)} recipes into {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,51 @@
+import heapq
+import itertools
 import json
-from utils.normalizer import normalize_ingredient, normalize_ingredient_list
+import logging
+import os
+import sqlite3
+import threading
+from collections import deque
+from utils.cache import LRUCache
+from utils.database import DATABASE_PATH, RecipeDatabase, is_database_path
+from utils.metrics import increment, timed, timer
+from utils.normalizer import normalize_ingredient, normalize_ingredient_batch, normalize_ingredient_list
+from utils.records import MatchInfo, Recipe, RecipeRecords, as_dict
+from utils.store import STORE_PATH, RecipeStore, is_stale
 
+logger = logging.getLogger(__name__)
 
-def load_recipes():
-    """Load recipes from JSON file"""
+# Set DISHGPT_RECIPE_DB to serve recipes and substitutes from an SQLite
+# catalog (see utils.database) instead of the JSON files
+RECIPE_DB_PATH = os.getenv('DISHGPT_RECIPE_DB')
+RECIPES_PATH = RECIPE_DB_PATH or 'data/recipes.json'
+SUBSTITUTES_PATH = RECIPE_DB_PATH or 'data/substitutes.json'
+
+# Scoring backends accepted by find_matching_recipes
+MATCH_BACKENDS = ('python', 'vector', 'sql')
+
+# Backends the app and the API warm up at startup (see warm_up), comma
+# separated; DISHGPT_PRELOAD=0 leaves everything to the first search
+PRELOAD_BACKENDS = [
+    backend.strip() for backend in os.getenv('DISHGPT_PRELOAD', 'python').split(',')
+    if backend.strip() in MATCH_BACKENDS
+]
+
+# Bounds for the find_matching_recipes result cache
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL = 3600
+
+# Pantries normalized, deduplicated and scored together by find_matching_recipes_batch
+BATCH_CHUNK_SIZE = 1024
+
+
+@timed('recipes_load')
+def load_recipes(path=RECIPES_PATH):
+    """Load recipes from JSON file, or from a recipe database (.db, .sqlite, .sqlite3)"""
+    if is_database_path(path):
+        return _load_from_database(path, RecipeDatabase.load_recipes, [])
     try:
-        with open('data/recipes.json', 'r', encoding='utf-8') as f:
+        with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
             return data.get('recipes', [])
     except FileNotFoundError:
@@ -14,10 +54,13 @@ def load_recipes():
         return []
 
 
-def load_substitutes():
-    """Load ingredient substitutes from JSON file"""
+@timed('substitutes_load')
+def load_substitutes(path=SUBSTITUTES_PATH):
+    """Load ingredient substitutes from JSON file, or from a recipe database"""
+    if is_database_path(path):
+        return _load_from_database(path, RecipeDatabase.load_substitutes, {})
     try:
-        with open('data/substitutes.json', 'r', encoding='utf-8') as f:
+        with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
             return data.get('substitutes', {})
     except FileNotFoundError:
@@ -26,19 +69,299 @@ def load_substitutes():
         return {}
 
 
+def _load_from_database(path, read, default):
+    """read(database), or `default` if the database is missing or unreadable"""
+    if not os.path.exists(path):
+        return default
+    try:
+        return read(RecipeDatabase(path, readonly=True))
+    except sqlite3.Error as e:
+        logger.warning("Could not read %s (%s)", path, e)
+        return default
+
+
+def _normalized_ingredient_sets(recipe):
+    """Return the normalized (mandatory, optional) ingredient sets of a recipe"""
+    ingredients = recipe['ingredients']
+    mandatory = frozenset(normalize_ingredient(i['name']) for i in ingredients['mandatory'])
+    optional = frozenset(normalize_ingredient(i['name']) for i in ingredients.get('optional', []))
+    return mandatory, optional
+
+
+def _record_ingredient_sets(recipe):
+    """_normalized_ingredient_sets for a Recipe record"""
+    mandatory = frozenset(normalize_ingredient(i.name) for i in recipe.mandatory)
+    optional = frozenset(normalize_ingredient(i.name) for i in recipe.optional or ())
+    return mandatory, optional
+
+
+class RecipeIndex:
+    """
+    In-memory recipe corpus, loaded and normalized once
+
+    Recipes are addressed by their position in the corpus. The recipe 'id'
+    field is not guaranteed to be unique (AI recipes reuse it), so positions
+    are what the inverted index stores.
+
+    Attributes:
+        recipes (list): Recipe records (see utils.records); a lazily decoded
+            sequence when built from a RecipeStore
+        types (list): Recipe 'type' per recipe
+        mandatory (list): Normalized mandatory ingredient set per recipe
+        optional (list): Normalized optional ingredient set per recipe
+        postings (dict): Normalized ingredient -> list of recipe positions
+        mandatory_postings (dict): Same, restricted to mandatory ingredients
+        always_makeable (list): Positions of recipes with no mandatory ingredients
+        store (RecipeStore): The compiled store the index was built from, or None
+    """
+
+    def __init__(self, recipes):
+        # Records instead of dicts: slotted, with interned strings
+        recipes = [recipe if isinstance(recipe, Recipe) else Recipe.from_dict(recipe) for recipe in recipes]
+        self._build(
+            recipes,
+            [recipe.type for recipe in recipes],
+            (_record_ingredient_sets(recipe) for recipe in recipes)
+        )
+
+    @timed('index_build')
+    def _build(self, recipes, types, ingredient_sets, store=None):
+        self.recipes = recipes
+        self.types = types
+        self.store = store
+        self.mandatory = []
+        self.optional = []
+        self.postings = {}
+        self.mandatory_postings = {}
+        self.always_makeable = []
+
+        for position, (mandatory, optional) in enumerate(ingredient_sets):
+            self.mandatory.append(mandatory)
+            self.optional.append(optional)
+
+            for ingredient in mandatory | optional:
+                self.postings.setdefault(ingredient, []).append(position)
+            for ingredient in mandatory:
+                self.mandatory_postings.setdefault(ingredient, []).append(position)
+
+            if not mandatory:
+                self.always_makeable.append(position)
+
+    @classmethod
+    def from_file(cls, path=RECIPES_PATH):
+        """Build an index from a recipes JSON file"""
+        return cls(load_recipes(path))
+
+    @classmethod
+    def from_store(cls, store):
+        """
+        Build an index from a compiled RecipeStore (see utils.store)
+
+        Ingredients come pre-normalized from the store and recipe bodies stay
+        in the memory-mapped file until a recipe is returned.
+        """
+        index = cls.__new__(cls)
+        index._build(RecipeRecords(store.recipes), store.types, store.ingredient_sets(), store)
+        return index
+
+    def substitute_blocks(self):
+        """
+        The recipes' own 'substitutes' blocks
+        
+        Read from the store's substitutes section when there is a store, so
+        no recipe body is decoded.
+        
+        Returns:
+            dict: Position -> ingredient -> substitutes, for the recipes that
+                have a non-empty block
+        """
+        if self.store is not None:
+            return self.store.substitute_blocks()
+        return {position: recipe.substitutes for position, recipe in enumerate(self.recipes) if recipe.substitutes}
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def candidates(self, user_set):
+        """
+        Positions of recipes worth scoring for a set of normalized ingredients
+        
+        A recipe sharing no ingredient with the user always scores 0, unless it
+        has no mandatory ingredients at all, in which case it can be made now.
+        """
+        positions = set(self.always_makeable)
+        for ingredient in user_set:
+            positions.update(self.postings.get(ingredient, ()))
+        return sorted(positions)
+
+    def makeable(self, user_set):
+        """Positions of recipes whose mandatory ingredients are all in `user_set`"""
+        hits = {}
+        for ingredient in user_set:
+            for position in self.mandatory_postings.get(ingredient, ()):
+                hits[position] = hits.get(position, 0) + 1
+
+        positions = [p for p, count in hits.items() if count == len(self.mandatory[p])]
+        return sorted(positions + self.always_makeable)
+
+    def match(self, position, user_set):
+        """Score the recipe at `position` against a set of normalized ingredients"""
+        return _score_sets(user_set, self.mandatory[position], self.optional[position])
+
+
+_recipe_index = None
+_recipe_index_lock = threading.Lock()
+
+
+def load_recipe_index(recipes_path=RECIPES_PATH, store_path=STORE_PATH):
+    """
+    Build a recipe index, from the compiled store when it is up to date
+
+    Falls back to the JSON file when the store is missing, older than the
+    JSON, or unreadable.
+    """
+    if os.path.exists(store_path):
+        if is_stale(store_path, recipes_path):
+            logger.warning("%s is older than %s; loading the JSON instead. Rebuild it with: "
+                           "python -m utils.store", store_path, recipes_path)
+        else:
+            try:
+                with timer('recipes_load'):
+                    store = RecipeStore(store_path)
+                return RecipeIndex.from_store(store)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not open %s (%s); loading the JSON instead", store_path, e)
+
+    return RecipeIndex.from_file(recipes_path)
+
+
+def get_recipe_index():
+    """Return the process-wide recipe index, loading it on first use"""
+    global _recipe_index
+
+    if _recipe_index is None:
+        with _recipe_index_lock:
+            if _recipe_index is None:
+                _recipe_index = load_recipe_index()
+
+    return _recipe_index
+
+
+def set_recipe_index(index):
+    """Serve searches from `index` (e.g. a synthetic corpus) instead of recipes.json"""
+    global _recipe_index
+
+    with _recipe_index_lock:
+        _recipe_index = index
+
+
+def reset_recipe_index():
+    """Drop the process-wide recipe index so the next search reloads it"""
+    global _recipe_index
+
+    with _recipe_index_lock:
+        _recipe_index = None
+
+
+_recipe_database = None
+_recipe_database_lock = threading.Lock()
+
+
+def get_recipe_database():
+    """
+    Return the process-wide recipe database used by the 'sql' backend
+    
+    The database is opened read-only: FileNotFoundError if it doesn't exist,
+    rather than searching a new, empty catalog.
+    """
+    global _recipe_database
+
+    if _recipe_database is None:
+        with _recipe_database_lock:
+            if _recipe_database is None:
+                _recipe_database = RecipeDatabase(RECIPE_DB_PATH or DATABASE_PATH, readonly=True)
+
+    return _recipe_database
+
+
+def set_recipe_database(database):
+    """Serve 'sql' searches from `database` (a RecipeDatabase)"""
+    global _recipe_database
+
+    with _recipe_database_lock:
+        _recipe_database = database
+
+
+_result_cache = LRUCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+# Kind of source ('index' or 'database') -> (source, tag); cache keys start
+# with the tag of the source they rank, so the python / vector and sql
+# backends share the cache without invalidating each other
+_result_cache_sources = {}
+_result_cache_tags = itertools.count()
+_result_cache_lock = threading.Lock()
+
+
+def _source_kind(source):
+    return 'database' if isinstance(source, RecipeDatabase) else 'index'
+
+
+def _cached_results(source, key):
+    """
+    Look up a cached ranking of `source` (a RecipeIndex or RecipeDatabase)
+    
+    When `source` replaces the previous index (or database), the rankings of
+    the previous one are dropped.
+    """
+    kind = _source_kind(source)
+    with _result_cache_lock:
+        current = _result_cache_sources.get(kind)
+        if current is None or current[0] is not source:
+            if current is not None:
+                _result_cache.discard_if(lambda cached: cached[0] == current[1])
+            current = _result_cache_sources[kind] = (source, next(_result_cache_tags))
+        return _result_cache.get((current[1],) + key)
+
+
+def _cache_results(source, key, scored):
+    """
+    Cache a ranking of `source`
+    
+    Dropped if `source` has been replaced meanwhile (a search that started
+    before a reload finishing after it).
+    """
+    with _result_cache_lock:
+        current = _result_cache_sources.get(_source_kind(source))
+        if current is not None and current[0] is source:
+            _result_cache.put((current[1],) + key, scored)
+
+
+def result_cache_info():
+    """
+    Statistics for the find_matching_recipes result cache
+    
+    Returns:
+        dict: hits, misses, hit_ratio, size, maxsize, evictions, expirations
+    """
+    return _result_cache.stats()
+
+
+def clear_result_cache():
+    """Drop every cached find_matching_recipes result"""
+    _result_cache.clear()
+
+
 def calculate_match_score(user_ingredients, recipe):
     """
     IMPROVED: Calculate how well user ingredients match a recipe
     Now prioritizes recipes that can be made with what user has
     """
     # Extract all recipe ingredients
-    mandatory = [normalize_ingredient(i['name']) for i in recipe['ingredients']['mandatory']]
-    optional = [normalize_ingredient(i['name']) for i in recipe['ingredients']['optional']]
-    
-    mandatory_set = set(mandatory)
-    optional_set = set(optional)
-    user_set = set(user_ingredients)
-    
+    mandatory_set, optional_set = _normalized_ingredient_sets(recipe)
+    return _score_sets(set(user_ingredients), mandatory_set, optional_set).to_dict()
+
+
+def _score_sets(user_set, mandatory_set, optional_set):
+    """Score pre-normalized ingredient sets (see calculate_match_score); returns a MatchInfo"""
     # Calculate matches
     matched_mandatory = user_set & mandatory_set
     matched_optional = user_set & optional_set
@@ -47,85 +370,634 @@ def calculate_match_score(user_ingredients, recipe):
     missing_mandatory = mandatory_set - user_set
     missing_optional = optional_set - user_set
     
+    return MatchInfo(
+        score=_score_counts(len(mandatory_set) + len(optional_set), len(missing_mandatory),
+                            len(matched_total), len(matched_optional)),
+        matched=tuple(matched_total),
+        missing_mandatory=tuple(missing_mandatory),
+        missing_optional=tuple(missing_optional),
+        can_make_now=len(missing_mandatory) == 0  # NEW: Can user make this right now?
+    )
+
+
+def _score_counts(total_recipe_ingredients, missing_mandatory, matched_total, matched_optional):
+    """Match score from ingredient counts (see calculate_match_score)"""
     # NEW SCORING LOGIC
     # Base score: How many of user's ingredients are used
-    total_recipe_ingredients = len(mandatory_set) + len(optional_set)
-    
     if total_recipe_ingredients == 0:
         match_percentage = 0
     else:
         # Calculate what % of the recipe the user can make
-        ingredient_coverage = (len(matched_total) / total_recipe_ingredients) * 100
+        ingredient_coverage = (matched_total / total_recipe_ingredients) * 100
         
         # HUGE bonus if ALL mandatory ingredients are met
-        if len(missing_mandatory) == 0:
+        if missing_mandatory == 0:
             mandatory_bonus = 50  # Big boost!
         else:
             # Penalty for each missing mandatory ingredient
-            mandatory_penalty = len(missing_mandatory) * 15
+            mandatory_penalty = missing_mandatory * 15
             mandatory_bonus = -mandatory_penalty
         
         # Small bonus for optional matches
-        optional_bonus = len(matched_optional) * 5
+        optional_bonus = matched_optional * 5
         
         # Calculate final score
         match_percentage = ingredient_coverage + mandatory_bonus + optional_bonus
         match_percentage = max(0, min(100, match_percentage))  # Clamp between 0-100
     
-    return {
-        'score': round(match_percentage, 1),
-        'matched': list(matched_total),
-        'missing_mandatory': list(missing_mandatory),
-        'missing_optional': list(missing_optional),
-        'has_all_mandatory': len(missing_mandatory) == 0,
-        'can_make_now': len(missing_mandatory) == 0  # NEW: Can user make this right now?
-    }
+    return round(match_percentage, 1)
 
 
-def find_matching_recipes(user_ingredients, dietary_filter=None, min_score=0):
+def _rank_recipes(index, user_set, dietary_filter=None, min_score=0, limit=None,
+                  can_make_now_only=False):
+    """Score candidate recipes one at a time; returns (position, match_info) pairs"""
+    with timer('score'):
+        if can_make_now_only:
+            positions = index.makeable(user_set)
+        else:
+            positions = index.candidates(user_set)
+        
+        # Calculate matches for each candidate recipe
+        scored = []
+        for position in positions:
+            # Apply dietary filter
+            if dietary_filter and index.types[position] != dietary_filter:
+                continue
+            
+            match_info = index.match(position, user_set)
+            if match_info.score < min_score:
+                continue
+            
+            scored.append((position, match_info))
+    
+    return _sort_ranked(scored, limit)
+
+
+def _rank_database(database, user_set, dietary_filter=None, min_score=0, limit=None,
+                   can_make_now_only=False):
+    """
+    Score the candidates a RecipeDatabase selects; returns (position, match_info) pairs
+    
+    Candidate selection and the dietary filter run as one indexed query, so
+    only recipes that can rank are read.
+    """
+    with timer('score'):
+        scored = []
+        for position, mandatory, optional in database.candidates(user_set, dietary_filter):
+            match_info = _score_sets(user_set, mandatory, optional)
+            if can_make_now_only and not match_info.can_make_now:
+                continue
+            if match_info.score < min_score:
+                continue
+            
+            scored.append((position, match_info))
+    
+    return _sort_ranked(scored, limit)
+
+
+def _rank_substitutes(index, user_set, dietary_filter=None, min_score=0, limit=None,
+                      can_make_now_only=False):
+    """_rank_recipes counting substitutes as matches (see utils.substitution)"""
+    from utils.substitution import get_substitution_graph
+    graph = get_substitution_graph(index, get_substitute_store())
+    
+    with timer('score'):
+        coverable = graph.coverable(user_set)
+        
+        scored = []
+        for position in graph.candidates(user_set, coverable):
+            if dietary_filter and index.types[position] != dietary_filter:
+                continue
+            
+            match_info = graph.match(position, user_set, coverable)
+            if can_make_now_only and not match_info.can_make_now:
+                continue
+            if match_info.score < min_score:
+                continue
+            
+            scored.append((position, match_info))
+    
+    return _sort_ranked(scored, limit)
+
+
+def _sort_ranked(scored, limit):
+    """Order (position, match_info) pairs best first, keeping the best `limit`"""
+    # Sort by:
+    # 1. Can make NOW (all mandatory met) - these come first
+    # 2. Then by match score
+    def rank(item):
+        return (item[1].can_make_now, item[1].score)  # True comes before False
+    
+    with timer('sort'):
+        if limit is None:
+            scored.sort(key=rank, reverse=True)
+        else:
+            # Bounded heap; ties keep corpus order just like the stable sort
+            scored = heapq.nlargest(limit, scored, key=rank)
+    
+    return scored
+
+
+def _substitute_names(substitutes):
+    """Normalized ingredients and substitutes named in a substitute mapping"""
+    names = set()
+    for ingredient, options in substitutes.items():
+        names.add(normalize_ingredient(ingredient))
+        names.update(normalize_ingredient(option) for option in options)
+    return names
+
+
+def get_ingredient_resolver(backend='python'):
+    """
+    Return the fuzzy ingredient resolver (see utils.resolver) for a backend
+
+    Its vocabulary is every ingredient in the recipes and substitutes the
+    backend searches; it is rebuilt when those change.
+    """
+    from utils.resolver import get_resolver
+
+    if backend == 'sql':
+        database = get_recipe_database()
+        return get_resolver(
+            database,
+            lambda: set(database.ingredient_names()) | _substitute_names(database.load_substitutes()),
+            database.version()
+        )
+
+    index = get_recipe_index()
+    store = get_substitute_store()
+    version = store.global_substitutes()[1]
+    substitutes = store.lookup()
+    return get_resolver(index, lambda: set(index.postings) | _substitute_names(substitutes), version)
+
+
+def resolve_ingredients(user_ingredients, backend='python'):
+    """
+    Show how user ingredients are understood
+
+    Args:
+        user_ingredients (list or str): Ingredients the user has
+        backend (str): As for find_matching_recipes
+
+    Returns:
+        list: (normalized ingredient, resolved name, confidence) per
+            ingredient; confidence is 1.0 for known names and aliases and
+            0.0 for ingredients left as they are
+    """
+    resolver = get_ingredient_resolver(backend)
+    return [
+        (ingredient,) + resolver.resolve(ingredient)
+        for ingredient in normalize_ingredient_list(user_ingredients)
+    ]
+
+
+@timed('warm_up')
+def warm_up(backend='python', use_substitutes=False):
+    """
+    Build everything the first search would build, ahead of it
+
+    Loads the recipe index (or opens the database), the substitute lookup
+    and the ingredient resolver, plus the NumPy scorer for the 'vector'
+    backend and the substitution graph with use_substitutes. Nothing is
+    loaded at import time, so short-lived processes that never search
+    don't pay for any of it.
+
+    Returns:
+        int: Number of recipes available
+    """
+    if backend not in MATCH_BACKENDS:
+        raise ValueError(f"Unknown scoring backend: {backend}")
+
+    get_substitute_store().lookup()
+    get_ingredient_resolver(backend)
+
+    if backend == 'sql':
+        return len(get_recipe_database())
+
+    index = get_recipe_index()
+    if backend == 'vector':
+        from utils.scoring import get_vector_scorer
+        get_vector_scorer(index)
+    if use_substitutes:
+        from utils.substitution import get_substitution_graph
+        get_substitution_graph(index, get_substitute_store())
+    return len(index)
+
+
+def find_matching_recipes(user_ingredients, dietary_filter=None, min_score=0,
+                          limit=None, can_make_now_only=False, backend='python',
+                          use_cache=True, use_substitutes=False, fuzzy=True):
     """
     IMPROVED: Find recipes that match user ingredients
     Now shows recipes even with just 1-2 ingredients
+    
+    Only recipes sharing at least one ingredient with the user are scored;
+    every other recipe would score 0 and can't be made.
+    
+    Args:
+        user_ingredients (list or str): Ingredients the user has
+        dietary_filter (str): 'veg' or 'non-veg' or None
+        min_score (float): Drop recipes scoring below this
+        limit (int): Return only the best `limit` recipes (None for all)
+        can_make_now_only (bool): Only consider recipes whose mandatory
+            ingredients are all available
+        backend (str): 'python' to score candidates one by one, 'vector' to
+            score the whole corpus with NumPy (see utils.scoring), 'sql' to
+            select candidates in the recipe database (see utils.database)
+        use_cache (bool): Reuse the ranking of an earlier identical query.
+            Queries are identical when their normalized ingredients (in any
+            order) and other arguments match; the cache is dropped whenever
+            the recipe index is replaced or the database is written.
+        use_substitutes (bool): Count a recipe ingredient as available when
+            the user has one of its substitutes (see utils.substitution);
+            match_info then lists the 'substitutions' used. Not supported
+            by the 'sql' backend.
+        fuzzy (bool): Resolve misspelled or regional ingredient names
+            ("tomatos", "spring onion") to known ingredients first (see
+            utils.resolver). Known names are never changed.
+        
+    Returns:
+        list: Recipe dictionaries with 'match_info', best first
+    """
+    return [
+        as_dict(recipe, match_info)
+        for recipe, match_info in match_recipes(
+            user_ingredients, dietary_filter, min_score, limit, can_make_now_only, backend, use_cache,
+            use_substitutes, fuzzy
+        )
+    ]
+
+
+@timed('search')
+def match_recipes(user_ingredients, dietary_filter=None, min_score=0,
+                  limit=None, can_make_now_only=False, backend='python',
+                  use_cache=True, use_substitutes=False, fuzzy=True):
+    """
+    find_matching_recipes without building dictionaries
+    
+    Args:
+        As for find_matching_recipes
+        
+    Returns:
+        list: (Recipe, MatchInfo) pairs, best first (see utils.records).
+            Both are shared with the index and the result cache: read-only.
     """
+    if backend not in MATCH_BACKENDS:
+        raise ValueError(f"Unknown scoring backend: {backend}")
+    if use_substitutes and backend == 'sql':
+        raise ValueError("use_substitutes is not supported by the 'sql' backend")
+    
     # Normalize user ingredients
-    user_ingredients = normalize_ingredient_list(user_ingredients)
+    with timer('normalize'):
+        user_ingredients = normalize_ingredient_list(user_ingredients)
+        if fuzzy:
+            user_ingredients = get_ingredient_resolver(backend).resolve_list(user_ingredients)
     
-    # Load recipes
-    recipes = load_recipes()
+    user_set = set(user_ingredients)
+    cache_key = (frozenset(user_set), dietary_filter, min_score, limit, can_make_now_only)
     
-    if not recipes:
+    if backend == 'sql':
+        database = get_recipe_database()
+        cache_key += (database.version(),)
+        scored = _cached_results(database, cache_key) if use_cache else None
+        if use_cache:
+            increment('result_cache_misses' if scored is None else 'result_cache_hits')
+        
+        if scored is None:
+            scored = _rank_database(database, user_set, dietary_filter, min_score, limit, can_make_now_only)
+            if use_cache:
+                _cache_results(database, cache_key, scored)
+        
+        bodies = database.recipes(position for position, _ in scored)
+        return _materialize({position: Recipe.from_dict(recipe) for position, recipe in bodies.items()}, scored)
+    
+    # Recipes are loaded and normalized once per process
+    index = get_recipe_index()
+    
+    if not index.recipes:
         return []
     
-    # Calculate matches for each recipe
-    results = []
-    for recipe in recipes:
-        # Apply dietary filter
-        if dietary_filter and recipe['type'] != dietary_filter:
-            continue
+    if use_substitutes:
+        cache_key += ('substitutes', get_substitute_store().global_substitutes()[1])
+    
+    scored = _cached_results(index, cache_key) if use_cache else None
+    if use_cache:
+        increment('result_cache_misses' if scored is None else 'result_cache_hits')
+    
+    if scored is None:
+        if use_substitutes:
+            # Substitutions are resolved per recipe, whatever the backend
+            scored = _rank_substitutes(index, user_set, dietary_filter, min_score, limit, can_make_now_only)
+        elif backend == 'vector':
+            from utils.scoring import get_vector_scorer
+            with timer('score'):
+                scored = get_vector_scorer(index).rank(
+                    user_set, dietary_filter, min_score, limit, can_make_now_only
+                )
+        else:
+            scored = _rank_recipes(index, user_set, dietary_filter, min_score, limit, can_make_now_only)
+        
+        if use_cache:
+            _cache_results(index, cache_key, scored)
+    
+    return _materialize(index.recipes, scored)
+
+
+def _materialize(recipes, scored):
+    """
+    (Recipe, MatchInfo) pairs for (position, match_info) pairs
+    
+    `recipes` is indexed by position: the index's records, or a
+    position -> Recipe dict for recipes read from the database.
+    """
+    return [(recipes[position], match_info) for position, match_info in scored]
+
+
+def _normalize_pantries(pantries):
+    """
+    Normalize many pantries with one normalize_ingredient_batch call
+    
+    Returns:
+        list: One normalized ingredient list per pantry, as
+            normalize_ingredient_list would return it
+    """
+    raw = []
+    sizes = []
+    for pantry in pantries:
+        if isinstance(pantry, str):
+            pantry = [i.strip() for i in pantry.split(',')]
+        else:
+            pantry = list(pantry)
+        raw.extend(pantry)
+        sizes.append(len(pantry))
+    
+    normalized = normalize_ingredient_batch(raw)
+    
+    lists = []
+    start = 0
+    for size in sizes:
+        lists.append([ing for ing in dict.fromkeys(normalized[start:start + size]) if ing])
+        start += size
+    return lists
+
+
+def _match_batch_chunk(pantries, options):
+    """Results for one chunk of pantries; each distinct pantry is scored once"""
+    if options['backend'] == 'sql':
+        index = None
+        database = get_recipe_database()
+    else:
+        index = get_recipe_index()
+        if not index.recipes:
+            return [[] for _ in pantries]
+    
+    with timer('normalize'):
+        user_lists = _normalize_pantries(pantries)
+        if options['fuzzy']:
+            resolver = get_ingredient_resolver(options['backend'])
+            user_lists = [resolver.resolve_list(user_list) for user_list in user_lists]
+    
+    # Identical pantries (in any order or spelling) share one ranking
+    unique = {}
+    for user_list in user_lists:
+        unique.setdefault(frozenset(user_list), set(user_list))
+    increment('batch_pantries', len(pantries))
+    increment('batch_unique_pantries', len(unique))
+    
+    ranking_options = (options['dietary_filter'], options['min_score'],
+                       options['limit'], options['can_make_now_only'])
+    if options['use_substitutes']:
+        rankings = [_rank_substitutes(index, user_set, *ranking_options) for user_set in unique.values()]
+    elif options['backend'] == 'sql':
+        rankings = [_rank_database(database, user_set, *ranking_options) for user_set in unique.values()]
+    elif options['backend'] == 'vector':
+        from utils.scoring import get_vector_scorer
+        rankings = get_vector_scorer(index).rank_many(unique.values(), *ranking_options)
+    else:
+        rankings = [_rank_recipes(index, user_set, *ranking_options) for user_set in unique.values()]
+    
+    ranked = dict(zip(unique, rankings))
+    if index is None:
+        # One read for every recipe returned anywhere in the chunk
+        bodies = database.recipes({position for ranking in rankings for position, _ in ranking})
+        recipes = {position: Recipe.from_dict(recipe) for position, recipe in bodies.items()}
+    else:
+        recipes = index.recipes
+    return [
+        [as_dict(recipe, match_info) for recipe, match_info in _materialize(recipes, ranked[frozenset(user_list)])]
+        for user_list in user_lists
+    ]
+
+
+def find_matching_recipes_batch(pantries, dietary_filter=None, min_score=0, limit=None,
+                                can_make_now_only=False, backend='python',
+                                chunk_size=BATCH_CHUNK_SIZE, workers=None, use_substitutes=False,
+                                fuzzy=True):
+    """
+    Find matching recipes for many pantries
+    
+    Pantries are read `chunk_size` at a time. Each chunk is normalized in one
+    pass, identical pantries in it are scored once, and with the 'vector'
+    backend the whole chunk is scored as one matrix. Results are yielded as
+    they are ready, so memory stays bounded however many pantries there are.
+    The result cache is bypassed.
+    
+    Args:
+        pantries (iterable): Pantries, each a list of ingredients or a
+            comma-separated string; may be a generator
+        dietary_filter, min_score, limit, can_make_now_only, backend,
+            use_substitutes, fuzzy: As for find_matching_recipes, applied to
+            every pantry
+        chunk_size (int): Pantries handled together
+        workers (int): Score chunks in this many worker processes (None or
+            1 scores in this process). Forked workers inherit the current
+            recipe index; spawned workers load recipes.json.
         
-        match_info = calculate_match_score(user_ingredients, recipe)
+    Yields:
+        list: For each pantry, in input order, what find_matching_recipes
+            would return for it
+    """
+    if backend not in MATCH_BACKENDS:
+        raise ValueError(f"Unknown scoring backend: {backend}")
+    if use_substitutes and backend == 'sql':
+        raise ValueError("use_substitutes is not supported by the 'sql' backend")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    
+    options = {
+        'dietary_filter': dietary_filter,
+        'min_score': min_score,
+        'limit': limit,
+        'can_make_now_only': can_make_now_only,
+        'backend': backend,
+        'use_substitutes': use_substitutes,
+        'fuzzy': fuzzy
+    }
+    pantries = iter(pantries)
+    chunks = iter(lambda: list(itertools.islice(pantries, chunk_size)), [])
+    
+    if not workers or workers <= 1:
+        for chunk in chunks:
+            yield from _match_batch_chunk(chunk, options)
+        return
+    
+    # Load the index before forking so workers share it
+    if backend != 'sql':
+        get_recipe_index()
+    
+    # Imported here: it pulls in multiprocessing, which single-process
+    # callers shouldn't pay for at startup
+    from concurrent.futures import ProcessPoolExecutor
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # A bounded window of chunks in flight keeps memory flat
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_match_batch_chunk, chunk, options))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def build_substitute_lookup(substitutes, recipes=()):
+    """
+    Merge global and per-recipe substitutes into one normalized lookup
+    
+    Args:
+        substitutes (dict): Ingredient -> substitutes, as in substitutes.json
+        recipes (list): Recipes whose 'substitutes' blocks are merged in
         
-        # CHANGED: Show ALL recipes, even with low scores
-        # Users can see what they're missing
-        result = {
-            **recipe,
-            'match_info': match_info
-        }
-        results.append(result)
+    Returns:
+        dict: Normalized ingredient -> substitutes. Global entries come first;
+            a substitute already listed under another spelling is skipped.
+    """
+    return _merge_substitutes([substitutes] + [recipe.get('substitutes') or {} for recipe in recipes])
+
+
+def _merge_substitutes(blocks):
+    """build_substitute_lookup over ingredient -> substitutes blocks, in order"""
+    lookup = {}
+    seen = {}
     
-    # Sort by:
-    # 1. Can make NOW (all mandatory met) - these come first
-    # 2. Then by match score
-    results.sort(key=lambda x: (
-        x['match_info']['can_make_now'],  # True comes before False
-        x['match_info']['score']
-    ), reverse=True)
+    for block in blocks:
+        for ingredient, options in block.items():
+            key = normalize_ingredient(ingredient)
+            if not key:
+                continue
+            merged = lookup.setdefault(key, [])
+            known = seen.setdefault(key, set())
+            for option in options:
+                normalized = normalize_ingredient(option)
+                if normalized and normalized not in known:
+                    known.add(normalized)
+                    merged.append(option)
     
-    return results
+    return lookup
+
+
+class SubstituteStore:
+    """
+    Process-wide substitute lookup, loaded once
+    
+    The lookup is rebuilt when substitutes.json or recipes.json changes on
+    disk (checked by mtime and size on every lookup, never by re-reading).
+    Per-recipe substitutes come from the compiled store when it is up to
+    date, so recipes.json is only parsed when the index was too.
+    """
+
+    def __init__(self, substitutes_path=SUBSTITUTES_PATH, recipes_path=RECIPES_PATH,
+                 store_path=STORE_PATH):
+        self.substitutes_path = substitutes_path
+        self.recipes_path = recipes_path
+        self.store_path = store_path
+        self._lock = threading.Lock()
+        self._version = None
+        self._lookup = {}
+        self._global = {}
+
+    def _file_version(self):
+        version = []
+        for path in (self.substitutes_path, self.recipes_path):
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+
+    def _refresh(self):
+        version = self._file_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    increment('substitute_reloads')
+                    substitutes = load_substitutes(self.substitutes_path)
+                    self._lookup = _merge_substitutes([substitutes, self._recipe_substitutes()])
+                    self._global = build_substitute_lookup(substitutes)
+                    self._version = version
+        return version
+
+    def _recipe_substitutes(self):
+        """Every recipe's substitutes, merged: from the store if current, else recipes.json"""
+        if self.store_path and os.path.exists(self.store_path) and not is_stale(self.store_path, self.recipes_path):
+            try:
+                return RecipeStore(self.store_path).recipe_substitutes()
+            except (OSError, ValueError) as e:
+                logger.warning("Could not open %s (%s); loading the JSON instead", self.store_path, e)
+        return build_substitute_lookup({}, load_recipes(self.recipes_path))
+
+    def lookup(self):
+        """Return the current normalized lookup, reloading it if the files changed"""
+        self._refresh()
+        return self._lookup
+
+    def global_substitutes(self):
+        """
+        The substitutes file alone, without per-recipe blocks
+        
+        Returns:
+            tuple: (normalized ingredient -> substitutes, version of the files)
+        """
+        version = self._refresh()
+        return self._global, version
+
+    def get(self, ingredient):
+        """Substitutes for one ingredient"""
+        with timer('substitute_lookup'):
+            return list(self.lookup().get(normalize_ingredient(ingredient), []))
+
+    def get_many(self, ingredients):
+        """Substitutes for several ingredients, keyed by the names given"""
+        with timer('substitute_lookup'):
+            lookup = self.lookup()
+            return {
+                ingredient: list(lookup.get(normalize_ingredient(ingredient), []))
+                for ingredient in ingredients
+            }
+
+
+_substitute_store = SubstituteStore()
+
+
+def get_substitute_store():
+    """Return the process-wide substitute store"""
+    return _substitute_store
 
 
 def get_substitutes_for_ingredient(ingredient):
     """Get substitutes for a given ingredient"""
-    substitutes_db = load_substitutes()
-    normalized = normalize_ingredient(ingredient)
-    return substitutes_db.get(normalized, [])
\ No newline at end of file
+    return _substitute_store.get(ingredient)
+
+
+def get_substitutes_for_ingredients(ingredients):
+    """
+    Get substitutes for several ingredients at once
+    
+    Args:
+        ingredients (list): Ingredient names
+        
+    Returns:
+        dict: Ingredient name (as given) -> list of substitutes
+    """
+    return _substitute_store.get_many(ingredients)
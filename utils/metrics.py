@@ -0,0 +1,232 @@
+"""
+Lightweight instrumentation for the hot paths
+
+Counters, gauges and timers are kept in a process-wide registry and can be
+exported as Prometheus text or JSON. Inside `with trace() as spans:` every
+timed operation of the current request (including work it hands to the
+search thread pool) is also appended to `spans`.
+
+Set DISHGPT_METRICS=0 to turn timers, counters and gauges into no-ops.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+METRICS_ENABLED = os.getenv('DISHGPT_METRICS', '1') != '0'
+
+METRIC_PREFIX = 'dishgpt'
+
+# Histogram bucket upper bounds, in seconds
+TIMER_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+_current_trace = contextvars.ContextVar('dishgpt_trace', default=None)
+
+
+class TimerStats:
+    """Count, total, max and bucketed durations of one timed operation"""
+
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(TIMER_BUCKETS)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        for i, bound in enumerate(TIMER_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class _Timing:
+    """Context manager recording the duration of its block into a registry"""
+
+    __slots__ = ('registry', 'name', 'started')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters, gauges and timers"""
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._timers = {}
+
+    def increment(self, name, value=1):
+        """Add `value` to counter `name`"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        """Set gauge `name` to `value`"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, seconds):
+        """Record one duration for timer `name`, and in the active trace"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._timers.get(name)
+            if stats is None:
+                stats = self._timers[name] = TimerStats()
+            stats.observe(seconds)
+
+        spans = _current_trace.get()
+        if spans is not None:
+            spans.append({'name': name, 'ms': seconds * 1000})
+
+    def timer(self, name):
+        """Context manager timing its block under `name`"""
+        if not self.enabled:
+            return nullcontext()
+        return _Timing(self, name)
+
+    def reset(self):
+        """Drop every counter, gauge and timer"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timers.clear()
+
+    def snapshot(self):
+        """
+        Current values
+
+        Returns:
+            dict: {'counters': {name: value}, 'gauges': {name: value},
+                'timers': {name: {count, total_seconds, mean_seconds,
+                max_seconds, buckets}}}
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'timers': {
+                    name: {
+                        'count': stats.count,
+                        'total_seconds': stats.total,
+                        'mean_seconds': stats.total / stats.count if stats.count else 0.0,
+                        'max_seconds': stats.max,
+                        'buckets': dict(zip(map(str, TIMER_BUCKETS), stats.buckets))
+                    }
+                    for name, stats in self._timers.items()
+                }
+            }
+
+    def export_json(self):
+        """Current values as a JSON document"""
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def export_prometheus(self):
+        """Current values in the Prometheus text exposition format"""
+        lines = []
+
+        with self._lock:
+            for name in sorted(self._counters):
+                metric = _metric_name(name) + '_total'
+                lines.append(f'# TYPE {metric} counter')
+                lines.append(f'{metric} {self._counters[name]}')
+
+            for name in sorted(self._gauges):
+                metric = _metric_name(name)
+                lines.append(f'# TYPE {metric} gauge')
+                lines.append(f'{metric} {self._gauges[name]}')
+
+            for name in sorted(self._timers):
+                stats = self._timers[name]
+                metric = _metric_name(name) + '_seconds'
+                lines.append(f'# TYPE {metric} histogram')
+                cumulative = 0
+                for bound, count in zip(TIMER_BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {stats.count}')
+                lines.append(f'{metric}_sum {stats.total}')
+                lines.append(f'{metric}_count {stats.count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _metric_name(name):
+    return f"{METRIC_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+
+registry = MetricsRegistry()
+
+
+def timer(name):
+    """Time a block in the process-wide registry: `with timer('score'): ...`"""
+    return registry.timer(name)
+
+
+def timed(name):
+    """Decorator timing every call of a function under `name`"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with registry.timer(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def increment(name, value=1):
+    """Add to a counter in the process-wide registry"""
+    registry.increment(name, value)
+
+
+def observe(name, seconds):
+    """Record a duration measured by the caller in the process-wide registry"""
+    registry.observe(name, seconds)
+
+
+def set_gauge(name, value):
+    """Set a gauge in the process-wide registry"""
+    registry.set_gauge(name, value)
+
+
+@contextmanager
+def trace():
+    """
+    Collect the timed operations of one request
+
+    Yields:
+        list: Filled with {'name', 'ms'} spans as operations finish
+    """
+    spans = []
+    token = _current_trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _current_trace.reset(token)
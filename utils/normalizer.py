@@ -1,80 +1,117 @@
-import re
+from functools import lru_cache
+
+# Upper bound on distinct raw strings kept by normalize_ingredient's cache
+NORMALIZE_CACHE_SIZE = 65536
+
+# Common plurals mapped to their singular form
+SINGULAR_MAPPINGS = {
+    'tomatoes': 'tomato',
+    'potatoes': 'potato',
+    'onions': 'onion',
+    'carrots': 'carrot',
+    'peppers': 'pepper',
+    'mushrooms': 'mushroom',
+    'beans': 'bean',
+    'peas': 'pea',
+    'chickpeas': 'chickpea',
+    'eggs': 'egg',
+    'cloves': 'clove',
+    'leaves': 'leaf'
+}
+
+# Common words that don't affect matching (removed as whole words only, so
+# "groundnut" keeps its "ground")
+WORDS_TO_REMOVE = frozenset([
+    'fresh', 'dried', 'raw', 'cooked', 'chopped', 'diced',
+    'sliced', 'minced', 'whole', 'ground', 'powdered',
+    'large', 'small', 'medium'
+])
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize(ingredient):
+    # Lowercase, split on any run of whitespace and drop filler words in one pass
+    words = [word for word in ingredient.lower().split() if word not in WORDS_TO_REMOVE]
+    ingredient = ' '.join(words)
+
+    # Remove common suffixes (plurals, etc.)
+    return SINGULAR_MAPPINGS.get(ingredient, ingredient)
+
 
 def normalize_ingredient(ingredient):
     """
     Normalize ingredient name for better matching
-    
+
+    Results are cached per raw string; see normalize_cache_info().
+
     Args:
         ingredient (str): Raw ingredient name
-        
+
     Returns:
         str: Normalized ingredient name
     """
     if not ingredient:
         return ""
-    
-    # Convert to lowercase
-    ingredient = ingredient.lower().strip()
-    
-    # Remove extra spaces
-    ingredient = re.sub(r'\s+', ' ', ingredient)
-    
-    # Remove common suffixes (plurals, etc.)
-    singular_mappings = {
-        'tomatoes': 'tomato',
-        'potatoes': 'potato',
-        'onions': 'onion',
-        'carrots': 'carrot',
-        'peppers': 'pepper',
-        'mushrooms': 'mushroom',
-        'beans': 'bean',
-        'peas': 'pea',
-        'chickpeas': 'chickpea',
-        'eggs': 'egg',
-        'cloves': 'clove',
-        'leaves': 'leaf'
+
+    return _normalize(ingredient)
+
+
+def normalize_ingredient_batch(ingredients):
+    """
+    Normalize many ingredient names in one call
+
+    Each distinct raw string is normalized once, however often it repeats.
+
+    Args:
+        ingredients (iterable): Raw ingredient names
+
+    Returns:
+        list: Normalized names, one per input, in input order
+    """
+    ingredients = list(ingredients)
+    normalized = {raw: normalize_ingredient(raw) for raw in dict.fromkeys(ingredients)}
+    return [normalized[raw] for raw in ingredients]
+
+
+def normalize_cache_info():
+    """
+    Statistics for the normalize_ingredient cache
+
+    Returns:
+        dict: hits, misses, hit_ratio, size and maxsize
+    """
+    info = _normalize.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'hit_ratio': info.hits / lookups if lookups else 0.0,
+        'size': info.currsize,
+        'maxsize': info.maxsize
     }
-    
-    if ingredient in singular_mappings:
-        ingredient = singular_mappings[ingredient]
-    
-    # Remove common words that don't affect matching
-    words_to_remove = ['fresh', 'dried', 'raw', 'cooked', 'chopped', 'diced', 
-                       'sliced', 'minced', 'whole', 'ground', 'powdered',
-                       'large', 'small', 'medium']
-    
-    for word in words_to_remove:
-        ingredient = ingredient.replace(word, '').strip()
-    
-    # Clean up multiple spaces again
-    ingredient = re.sub(r'\s+', ' ', ingredient)
-    
-    return ingredient
+
+
+def clear_normalize_cache():
+    """Empty the normalize_ingredient cache and reset its statistics"""
+    _normalize.cache_clear()
 
 
 def normalize_ingredient_list(ingredients):
     """
     Normalize a list of ingredients
-    
+
     Args:
         ingredients (list or str): List of ingredients or comma-separated string
-        
+
     Returns:
         list: List of normalized ingredients
     """
     if isinstance(ingredients, str):
         # Split by comma if it's a string
         ingredients = [i.strip() for i in ingredients.split(',')]
-    
+
     # Normalize each ingredient
-    normalized = [normalize_ingredient(ing) for ing in ingredients]
-    
+    normalized = normalize_ingredient_batch(ingredients)
+
     # Remove empty strings and duplicates while preserving order
-    seen = set()
-    result = []
-    for ing in normalized:
-        if ing and ing not in seen:
-            seen.add(ing)
-            result.append(ing)
-    
-    return result
\ No newline at end of file
+    return [ing for ing in dict.fromkeys(normalized) if ing]
@@ -0,0 +1,189 @@
+"""
+Model providers for AI recipe generation
+
+A provider builds the model object that utils.ai_helper talks to. Any
+model works as long as it has generate_content(prompt, stream=False)
+returning an object with a .text attribute, or an iterable of such chunks
+when streaming.
+
+FakeProvider is an offline stand-in for Gemini. Its responses follow the
+schema create_recipe_prompt asks for, and it can simulate latency, jitter,
+errors, malformed JSON and markdown fences, so the AI path can be tested
+and benchmarked without network access.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class ModelProvider(ABC):
+    """Interface for model providers"""
+
+    name = 'base'
+
+    @abstractmethod
+    def create_model(self, model_names):
+        """
+        Build a model
+
+        Args:
+            model_names (list): Preferred model names, best first
+
+        Returns:
+            tuple: (model, model_name, error); model is None on failure
+        """
+
+
+class FakeResponse:
+    """Stand-in for a Gemini response or streamed chunk"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModelError(RuntimeError):
+    """Simulated API failure raised by FakeModel"""
+
+
+CUISINES = ['Indian', 'Chinese', 'Italian', 'Continental', 'Asian']
+DISHES = ['Stir Fry', 'Curry', 'Bowl', 'Skillet', 'Bake', 'Salad']
+
+
+class FakeModel:
+    """
+    Offline model returning schema-valid recipe JSON for a recipe prompt
+
+    Args:
+        latency (float): Mean seconds per response
+        jitter (float): Latency varies uniformly by +/- this many seconds
+        error_rate (float): Fraction of calls raising FakeModelError
+        malformed_rate (float): Fraction of responses with truncated JSON
+        fence_rate (float): Fraction of responses wrapped in ```json fences
+        stream_chunks (int): Chunks per streamed response
+        seed (int): Seed for the simulated randomness (None for random)
+    """
+
+    def __init__(self, latency=1.0, jitter=0.0, error_rate=0.0, malformed_rate=0.0,
+                 fence_rate=0.0, stream_chunks=8, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.fence_rate = fence_rate
+        self.stream_chunks = max(1, stream_chunks)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _roll(self):
+        with self._lock:
+            self.calls += 1
+            return self._rng.random(), self._rng.random(), self._rng.random(), self._rng.uniform(-1, 1)
+
+    def _response_text(self, prompt, malformed, fenced):
+        match = re.search(r'using these ingredients: (.*)', prompt)
+        ingredients = [i.strip() for i in match.group(1).split(',')] if match else []
+        ingredients = [i for i in ingredients if i] or ['rice']
+
+        match = re.search(r'Create (\d+) ', prompt)
+        count = int(match.group(1)) if match else 2
+        recipe_type = 'veg' if 'MUST be VEGETARIAN' in prompt else 'non-veg'
+
+        recipes = []
+        for i in range(count):
+            main = ingredients[i % len(ingredients)]
+            recipes.append({
+                'id': 100 + i,
+                'name': f"{CUISINES[i % len(CUISINES)]} {main.title()} {DISHES[i % len(DISHES)]}",
+                'cuisine': CUISINES[i % len(CUISINES)],
+                'type': recipe_type,
+                'prep_time': '10 mins',
+                'cook_time': '15 mins',
+                'servings': 2,
+                'ingredients': {
+                    'mandatory': [
+                        {'name': name, 'amount': '1 cup', 'category': 'other'}
+                        for name in ingredients[:3]
+                    ],
+                    'optional': [
+                        {'name': name, 'amount': '1 tsp', 'category': 'other'}
+                        for name in ingredients[3:6]
+                    ]
+                },
+                'substitutes': {},
+                'instructions': [
+                    f"Step 1: Prepare the {main}",
+                    "Step 2: Cook everything together for 10 minutes",
+                    "Step 3: Season and serve"
+                ],
+                'tags': ['quick', 'easy'],
+                'difficulty': 'easy'
+            })
+
+        text = json.dumps({'recipes': recipes}, indent=2)
+        if malformed:
+            text = text[:len(text) // 2]
+        if fenced:
+            text = f"```json\n{text}\n```"
+        return text
+
+    def generate_content(self, prompt, stream=False):
+        """Simulate a Gemini call"""
+        error, malformed, fenced, jitter = self._roll()
+        delay = max(0.0, self.latency + jitter * self.jitter)
+        text = self._response_text(prompt, malformed < self.malformed_rate, fenced < self.fence_rate)
+
+        if not stream:
+            time.sleep(delay)
+            if error < self.error_rate:
+                raise FakeModelError("Simulated API error")
+            return FakeResponse(text)
+
+        return self._stream(text, delay, error < self.error_rate)
+
+    def _stream(self, text, delay, fail):
+        size = -(-len(text) // self.stream_chunks)
+        for start in range(0, len(text), size):
+            time.sleep(delay / self.stream_chunks)
+            if fail and start >= len(text) // 2:
+                raise FakeModelError("Simulated API error")
+            yield FakeResponse(text[start:start + size])
+
+
+class FakeProvider(ModelProvider):
+    """
+    Provider returning a FakeModel; see FakeModel for the options
+
+    Configured from the environment by from_env():
+        DISHGPT_FAKE_LATENCY, DISHGPT_FAKE_JITTER, DISHGPT_FAKE_ERROR_RATE,
+        DISHGPT_FAKE_MALFORMED_RATE, DISHGPT_FAKE_FENCE_RATE, DISHGPT_FAKE_SEED
+    """
+
+    name = 'fake'
+
+    def __init__(self, **options):
+        self.options = options
+
+    @classmethod
+    def from_env(cls):
+        options = {}
+        for option, variable, cast in [
+            ('latency', 'DISHGPT_FAKE_LATENCY', float),
+            ('jitter', 'DISHGPT_FAKE_JITTER', float),
+            ('error_rate', 'DISHGPT_FAKE_ERROR_RATE', float),
+            ('malformed_rate', 'DISHGPT_FAKE_MALFORMED_RATE', float),
+            ('fence_rate', 'DISHGPT_FAKE_FENCE_RATE', float),
+            ('seed', 'DISHGPT_FAKE_SEED', int)
+        ]:
+            value = os.getenv(variable)
+            if value:
+                options[option] = cast(value)
+        return cls(**options)
+
+    def create_model(self, model_names):
+        return FakeModel(**self.options), 'fake', None
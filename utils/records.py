@@ -0,0 +1,219 @@
+"""
+Compact recipe and match records
+
+Recipes are held in memory as __slots__ objects instead of nested dicts,
+with repeated strings (ingredient names, amounts, categories, types, tags)
+interned so every recipe shares one copy. Searches return
+(recipe, match_info) pairs that reference these records directly;
+as_dict() turns a pair back into the recipe dictionary with 'match_info'
+that find_matching_recipes has always returned.
+
+Records are shared between searches and cached results: treat them as
+read-only.
+"""
+
+import sys
+from collections.abc import Sequence
+
+# Recipe keys held in dedicated slots; every other key goes to Recipe.details
+_SLOT_KEYS = ('id', 'name', 'type', 'ingredients', 'substitutes')
+
+# One shared tuple per distinct key order, so to_dict() can restore it
+_layouts = {}
+
+
+def _intern(value):
+    """Intern a string, or the strings of a list; other values are returned as is"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [sys.intern(item) if isinstance(item, str) else item for item in value]
+    return value
+
+
+def _layout(keys):
+    keys = tuple(keys)
+    return _layouts.setdefault(keys, keys)
+
+
+class Ingredient:
+    """One ingredient line of a recipe"""
+
+    __slots__ = ('name', 'amount', 'category')
+
+    def __init__(self, name, amount=None, category=None):
+        self.name = _intern(name)
+        self.amount = _intern(amount)
+        self.category = _intern(category)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data.get('amount'), data.get('category'))
+
+    def to_dict(self):
+        if self.amount is not None and self.category is not None:
+            return {'name': self.name, 'amount': self.amount, 'category': self.category}
+        data = {'name': self.name}
+        if self.amount is not None:
+            data['amount'] = self.amount
+        if self.category is not None:
+            data['category'] = self.category
+        return data
+
+    def __repr__(self):
+        return f"Ingredient({self.name!r}, {self.amount!r}, {self.category!r})"
+
+
+class Recipe:
+    """
+    A recipe, as loaded from recipes.json
+
+    Attributes:
+        id, name, type: As in the JSON (None when absent)
+        mandatory (tuple): Mandatory Ingredient records
+        optional (tuple): Optional Ingredient records (None when the recipe
+            has no 'optional' list)
+        substitutes (dict): Ingredient -> substitutes (None when absent)
+        details (dict): Every other key (cuisine, instructions, tags, ...)
+    """
+
+    __slots__ = ('id', 'name', 'type', 'mandatory', 'optional', 'substitutes', 'details', '_layout', '_dict')
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a recipe dictionary"""
+        recipe = cls.__new__(cls)
+        recipe.id = data.get('id')
+        recipe.name = data['name']
+        recipe.type = _intern(data.get('type'))
+
+        ingredients = data['ingredients']
+        recipe.mandatory = tuple(Ingredient.from_dict(i) for i in ingredients['mandatory'])
+        optional = ingredients.get('optional')
+        recipe.optional = None if optional is None else tuple(Ingredient.from_dict(i) for i in optional)
+
+        substitutes = data.get('substitutes')
+        if substitutes is not None:
+            substitutes = {sys.intern(key): _intern(options) for key, options in substitutes.items()}
+        recipe.substitutes = substitutes
+
+        recipe.details = {key: _intern(value) for key, value in data.items() if key not in _SLOT_KEYS}
+        recipe._layout = _layout(data)
+        recipe._dict = None
+        return recipe
+
+    def ingredients(self):
+        """All Ingredient records, mandatory first"""
+        return self.mandatory + (self.optional or ())
+
+    def to_dict(self):
+        """
+        The recipe dictionary this record was built from
+
+        The dictionary is built the first time and copied on later calls. The
+        copy is shallow: adding or replacing keys is fine, but its nested
+        lists and dicts (ingredients, instructions, tags, substitutes) are
+        shared by every result for this recipe and must not be modified.
+        """
+        if self._dict is None:
+            ingredients = {'mandatory': [i.to_dict() for i in self.mandatory]}
+            if self.optional is not None:
+                ingredients['optional'] = [i.to_dict() for i in self.optional]
+
+            values = self.details.copy()
+            values['id'] = self.id
+            values['name'] = self.name
+            values['type'] = self.type
+            values['ingredients'] = ingredients
+            values['substitutes'] = self.substitutes
+            self._dict = {key: values[key] for key in self._layout}
+        return self._dict.copy()
+
+    def __repr__(self):
+        return f"Recipe(id={self.id!r}, name={self.name!r})"
+
+
+class MatchInfo:
+    """
+    How a recipe matches the user's ingredients
+
+    Ingredient lists are tuples so that a MatchInfo can be shared safely
+    between cached results. `substitutions` holds the (ingredient,
+    substitute) pairs counted as matched in substitute-aware matching, and
+    is None otherwise.
+    """
+
+    __slots__ = ('score', 'matched', 'missing_mandatory', 'missing_optional', 'can_make_now',
+                 'substitutions')
+
+    def __init__(self, score, matched, missing_mandatory, missing_optional, can_make_now,
+                 substitutions=None):
+        self.score = score
+        self.matched = matched
+        self.missing_mandatory = missing_mandatory
+        self.missing_optional = missing_optional
+        self.can_make_now = can_make_now
+        self.substitutions = substitutions
+
+    @property
+    def has_all_mandatory(self):
+        return self.can_make_now
+
+    def to_dict(self):
+        """The match_info dictionary calculate_match_score returns"""
+        data = {
+            'score': self.score,
+            'matched': list(self.matched),
+            'missing_mandatory': list(self.missing_mandatory),
+            'missing_optional': list(self.missing_optional),
+            'has_all_mandatory': self.can_make_now,
+            'can_make_now': self.can_make_now
+        }
+        if self.substitutions is not None:
+            data['substitutions'] = [
+                {'ingredient': ingredient, 'substitute': substitute}
+                for ingredient, substitute in self.substitutions
+            ]
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, MatchInfo):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"MatchInfo(score={self.score!r}, can_make_now={self.can_make_now!r})"
+
+
+def as_dict(recipe, match_info):
+    """
+    Compatibility adapter: a (recipe, match_info) result pair as a recipe
+    dictionary with 'match_info', like find_matching_recipes returns
+
+    The top level and 'match_info' are the caller's own; the nested recipe
+    fields are shared (see Recipe.to_dict).
+
+    Args:
+        recipe (Recipe): Recipe record
+        match_info (MatchInfo): Its match against the user's ingredients
+    """
+    data = recipe.to_dict()
+    data['match_info'] = match_info.to_dict()
+    return data
+
+
+class RecipeRecords(Sequence):
+    """Recipe records over a sequence of recipe dictionaries, built on access"""
+
+    def __init__(self, recipes):
+        self._recipes = recipes
+
+    def __len__(self):
+        return len(self._recipes)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [Recipe.from_dict(recipe) for recipe in self._recipes[position]]
+        return Recipe.from_dict(self._recipes[position])
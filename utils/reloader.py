@@ -0,0 +1,197 @@
+"""
+Hot reload of recipe and substitute data
+
+A DataWatcher polls the data files (recipes.json, substitutes.json and
+the compiled store) for changes to their inode, mtime or size. When a file
+changes and then stays unchanged for one more poll, a fresh RecipeIndex and
+substitute lookup are built on the watcher's thread and the index is
+swapped in with set_recipe_index. Searches already running keep the index
+they started with; searches started afterwards see the new one.
+
+Polling a handful of stat() calls every few seconds is cheap and works on
+every platform and filesystem, so no inotify dependency is needed.
+
+Set DISHGPT_HOT_RELOAD=0 to disable the watcher in the app and the API.
+"""
+
+import logging
+import os
+import threading
+import time
+from utils import matcher
+from utils.metrics import increment, observe, set_gauge
+from utils.store import STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+HOT_RELOAD_ENABLED = os.getenv('DISHGPT_HOT_RELOAD', '1') != '0'
+
+# Seconds between polls of the data files
+RELOAD_INTERVAL = float(os.getenv('DISHGPT_RELOAD_INTERVAL', '2'))
+
+
+def _signature(path):
+    """(inode, mtime, size) of a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class DataWatcher:
+    """
+    Background poller that reloads the recipe index when data files change
+
+    Args:
+        paths (list): Files to watch; defaults to the recipes, substitutes
+            and compiled store paths the matcher loads from
+        interval (float): Seconds between polls
+
+    Attributes:
+        version (int): Data version, incremented by every successful reload
+        reloads (int): Successful reloads
+        last_reload_seconds (float): Duration of the last reload
+        loaded_at (float): time.time() of the last reload (or of start)
+    """
+
+    def __init__(self, paths=None, interval=RELOAD_INTERVAL):
+        if paths is None:
+            paths = dict.fromkeys([matcher.RECIPES_PATH, matcher.SUBSTITUTES_PATH, STORE_PATH])
+        self.paths = list(paths)
+        self.interval = interval
+
+        self.version = 0
+        self.reloads = 0
+        self.last_reload_seconds = None
+        self.loaded_at = time.time()
+
+        self._signatures = self._current()
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _current(self):
+        return {path: _signature(path) for path in self.paths}
+
+    def start(self):
+        """Start polling on a daemon thread (no-op if already running)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='dishgpt-data-watcher', daemon=True)
+            self._thread.start()
+            set_gauge('data_version', self.version)
+
+    def stop(self, timeout=None):
+        """Stop polling and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Data watcher check failed")
+
+    def check(self):
+        """
+        Poll the data files once, reloading if they changed and have settled
+
+        Returns:
+            bool: True if a reload happened
+        """
+        current = self._current()
+        if current == self._signatures:
+            self._pending = None
+            return False
+
+        # Wait for one unchanged poll so half-written files aren't loaded
+        if current != self._pending:
+            self._pending = current
+            return False
+
+        self._pending = None
+        self._signatures = current
+        return self.reload()
+
+    def reload(self):
+        """
+        Build a new index and substitute lookup, then swap the index in
+
+        A reload that yields no recipes while recipes are loaded (e.g. a
+        file caught mid-write that doesn't parse) is rejected and the
+        current index kept.
+
+        Returns:
+            bool: True if the new data was swapped in
+        """
+        started = time.perf_counter()
+        index = matcher.load_recipe_index()
+
+        if not len(index) and len(matcher.get_recipe_index()):
+            increment('data_reload_errors')
+            logger.warning("Reloaded data has no recipes; keeping the current index")
+            return False
+
+        # Built here so no request pays for rebuilding it
+        matcher.get_substitute_store().lookup()
+        matcher.set_recipe_index(index)
+
+        self.last_reload_seconds = time.perf_counter() - started
+        self.loaded_at = time.time()
+        self.reloads += 1
+        self.version += 1
+
+        observe('data_reload', self.last_reload_seconds)
+        increment('data_reloads')
+        set_gauge('data_version', self.version)
+        logger.info("Reloaded %d recipes in %.3fs (data version %d)",
+                    len(index), self.last_reload_seconds, self.version)
+        return True
+
+    def status(self):
+        """
+        Reload statistics
+
+        Returns:
+            dict: version, reloads, last_reload_seconds, loaded_at, running
+        """
+        return {
+            'version': self.version,
+            'reloads': self.reloads,
+            'last_reload_seconds': self.last_reload_seconds,
+            'loaded_at': self.loaded_at,
+            'running': self._thread is not None and self._thread.is_alive()
+        }
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def start_watcher(interval=RELOAD_INTERVAL):
+    """Start the process-wide data watcher, once; returns it"""
+    global _watcher
+
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = DataWatcher(interval=interval)
+        _watcher.start()
+    return _watcher
+
+
+def get_watcher():
+    """Return the process-wide data watcher, or None if it was never started"""
+    return _watcher
+
+
+def stop_watcher():
+    """Stop and drop the process-wide data watcher"""
+    global _watcher
+
+    with _watcher_lock:
+        if _watcher is not None:
+            _watcher.stop()
+            _watcher = None
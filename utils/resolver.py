@@ -0,0 +1,232 @@
+"""
+Fuzzy ingredient resolution
+
+Maps pantry entries that don't exactly match any known ingredient
+("tomatos", "chiken", "spring onion") onto the canonical ingredient names
+used by the recipes and substitutes, so they still match.
+
+A token is resolved by, in order:
+    1. itself, if it is a known ingredient
+    2. the alias table (regional names and common variants)
+    3. for a single word, the closest known single-word ingredient by
+       character trigrams, if it is similar enough (FUZZY_THRESHOLD)
+    4. for several words, a known name with the same words but one, where
+       that one word is a single typo away (MAX_WORD_EDITS)
+
+Trigram similarity is the share of the longer word's trigrams that the two
+words have in common; trigrams are looked up in an inverted index. Names
+of several words are never matched on trigrams: "chicken stock" shares
+most of its trigrams with "chicken breast" but is a different ingredient,
+so only a near spelling such as "chiken stock" resolves to it. Fuzzy
+matches are only made against known ingredients, never alias keys, and
+every resolution is cached.
+"""
+
+import threading
+import weakref
+from utils.cache import LRUCache
+from utils.metrics import increment
+from utils.normalizer import normalize_ingredient
+
+# Minimum trigram similarity (0-1) for a fuzzy single-word resolution
+FUZZY_THRESHOLD = 0.55
+
+# Edits (insertion, deletion, substitution or transposition) allowed in the
+# one differing word of a multiword name
+MAX_WORD_EDITS = 1
+
+# Tokens shorter than this are never resolved fuzzily: one letter changes
+# too large a share of their trigrams ("pear" would become "pea")
+MIN_FUZZY_LENGTH = 5
+
+# Bound on cached resolutions per resolver
+RESOLVE_CACHE_SIZE = 65536
+
+# Normalized alias -> canonical ingredient
+ALIASES = {
+    'spring onion': 'green onion',
+    'scallion': 'green onion',
+    'scallions': 'green onion',
+    'capsicum': 'bell pepper',
+    'coriander': 'cilantro',
+    'coriander leaves': 'cilantro',
+    'prawn': 'shrimp',
+    'prawns': 'shrimp',
+    'curd': 'yogurt',
+    'yoghurt': 'yogurt',
+    'chilli': 'chili',
+    'chillies': 'chili',
+    'green chili': 'chili',
+    'green chilli': 'chili',
+    'mutton': 'lamb',
+    'chicken breast': 'chicken',
+    'chicken thigh': 'chicken',
+    'basmati rice': 'rice',
+    'jasmine rice': 'rice',
+    'spaghetti': 'pasta',
+    'penne': 'pasta',
+    'macaroni': 'pasta',
+    'bread crumbs': 'breadcrumbs',
+    'cheddar': 'cheese',
+    'mozzarella': 'cheese',
+    'parmesan': 'cheese',
+    'maida': 'flour',
+    'extra virgin olive oil': 'olive oil',
+    'courgette noodles': 'zucchini noodles'
+}
+
+
+def trigrams(name):
+    """Character trigrams of each word, padded like '  word '"""
+    grams = set()
+    for word in name.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_distance(a, b):
+    """Optimal string alignment distance: edits, counting a swap of neighbours as one"""
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1])
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class IngredientResolver:
+    """
+    Resolves normalized pantry tokens to canonical ingredient names
+
+    Args:
+        vocabulary (iterable): Canonical (normalized) ingredient names
+        aliases (dict): Normalized alias -> canonical name
+        threshold (float): Minimum similarity for a fuzzy resolution
+    """
+
+    def __init__(self, vocabulary, aliases=ALIASES, threshold=FUZZY_THRESHOLD,
+                 cache_size=RESOLVE_CACHE_SIZE):
+        self.vocabulary = frozenset(name for name in vocabulary if name)
+        self.aliases = {
+            normalize_ingredient(alias): normalize_ingredient(canonical)
+            for alias, canonical in aliases.items()
+        }
+        self.threshold = threshold
+        self._cache = LRUCache(maxsize=cache_size)
+
+        # Single-word targets, by trigram
+        self._targets = sorted(name for name in self.vocabulary if ' ' not in name)
+        self._sizes = []
+        self._postings = {}
+        for i, name in enumerate(self._targets):
+            grams = trigrams(name)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+
+        # Multiword targets, by their words with one left out:
+        # (words before, words after) -> [(left-out word, name)]
+        self._frames = {}
+        for name in sorted(self.vocabulary):
+            words = name.split()
+            if len(words) > 1:
+                for i, word in enumerate(words):
+                    frame = (tuple(words[:i]), tuple(words[i + 1:]))
+                    self._frames.setdefault(frame, []).append((word, name))
+
+    def resolve(self, ingredient):
+        """
+        Canonical name for one normalized ingredient
+
+        Returns:
+            tuple: (name, confidence); the name is returned unchanged with
+                confidence 0.0 if nothing is close enough
+        """
+        # Known names are the common case and need no cache entry
+        if ingredient in self.vocabulary:
+            return ingredient, 1.0
+
+        resolution = self._cache.get(ingredient)
+        if resolution is None:
+            resolution = self._resolve(ingredient)
+            self._cache.put(ingredient, resolution)
+            increment('ingredient_resolutions' if resolution[1] else 'ingredient_resolution_misses')
+        return resolution
+
+    def _resolve(self, ingredient):
+        if ingredient in self.aliases:
+            return self.aliases[ingredient], 1.0
+
+        words = ingredient.split()
+        if len(words) > 1:
+            return self._resolve_words(ingredient, words)
+        if len(ingredient) < MIN_FUZZY_LENGTH:
+            return ingredient, 0.0
+
+        grams = trigrams(ingredient)
+        shared = {}
+        for gram in grams:
+            for i in self._postings.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+
+        best, best_similarity = None, 0.0
+        for i, count in shared.items():
+            similarity = count / max(len(grams), self._sizes[i])
+            # Ties go to the alphabetically first name, so results are stable
+            if similarity > best_similarity or (similarity == best_similarity and best is not None and i < best):
+                best, best_similarity = i, similarity
+
+        if best is None or best_similarity < self.threshold:
+            return ingredient, 0.0
+        return self._targets[best], round(best_similarity, 3)
+
+    def _resolve_words(self, ingredient, words):
+        """A known name with the same words but one, that one a typo away"""
+        best, best_similarity = None, 0.0
+        for i, word in enumerate(words):
+            if len(word) < MIN_FUZZY_LENGTH:
+                continue
+            for known_word, name in self._frames.get((tuple(words[:i]), tuple(words[i + 1:])), ()):
+                if edit_distance(word, known_word) > MAX_WORD_EDITS:
+                    continue
+                similarity = 1 - edit_distance(word, known_word) / max(len(word), len(known_word))
+                if similarity > best_similarity or (similarity == best_similarity and name < best):
+                    best, best_similarity = name, similarity
+
+        if best is None:
+            return ingredient, 0.0
+        return best, round(best_similarity, 3)
+
+    def resolve_list(self, ingredients):
+        """Resolve normalized ingredients, dropping duplicates created by resolution"""
+        return list(dict.fromkeys(self.resolve(ingredient)[0] for ingredient in ingredients))
+
+    def cache_info(self):
+        """Statistics for the resolution cache (see LRUCache.stats)"""
+        return self._cache.stats()
+
+
+_resolvers = weakref.WeakKeyDictionary()
+_resolvers_lock = threading.Lock()
+
+
+def get_resolver(source, vocabulary, version=None):
+    """
+    Return the resolver for `source` (a RecipeIndex or RecipeDatabase)
+
+    `vocabulary` is called to list the canonical names when the resolver is
+    (re)built, which happens on first use and whenever `version` changes.
+    """
+    with _resolvers_lock:
+        entry = _resolvers.get(source)
+        if entry is None or entry[0] != version:
+            entry = _resolvers[source] = (version, IngredientResolver(vocabulary()))
+    return entry[1]
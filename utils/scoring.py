@@ -0,0 +1,244 @@
+"""
+Vectorized scoring backend for the recipe matcher
+
+Scores every recipe of a RecipeIndex in a handful of NumPy operations instead
+of one set intersection per recipe. Ingredients are mapped to integer ids and
+each ingredient's recipes are stored as a posting array, so counting a
+pantry's matches only touches the recipes that contain its ingredients, and
+memory grows with the number of ingredient mentions rather than
+recipes x vocabulary.
+
+Rankings are identical to the set-based scorer in utils.matcher; the
+match_info of the returned recipes is produced by that same scorer.
+
+Ranking only scores the (pantry, recipe) pairs that can rank at all, and
+many pantries can be ranked at once (rank_many): their pairs are counted
+and scored together in the same operations.
+"""
+
+import threading
+import weakref
+from utils.metrics import timer
+
+# Upper bound on pantries x recipes counted in one pass of rank_many
+MATRIX_BUDGET = 250_000
+
+# NumPy ships with Streamlit, but keep the matcher usable without it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+def _posting_arrays(ingredient_sets, vocabulary):
+    """
+    Invert per-recipe ingredient sets into per-ingredient posting arrays
+
+    Returns:
+        tuple: (positions, offsets, sizes); the recipes containing ingredient
+            id i are positions[offsets[i]:offsets[i + 1]], and sizes holds
+            the number of ingredients of each recipe
+    """
+    ids = []
+    sizes = []
+    for ingredients in ingredient_sets:
+        ids.extend(vocabulary[ingredient] for ingredient in ingredients)
+        sizes.append(len(ingredients))
+    ids = np.array(ids, dtype=np.int64)
+    sizes = np.array(sizes, dtype=np.int64)
+
+    recipes = np.repeat(np.arange(len(sizes), dtype=np.int64), sizes)
+    order = np.argsort(ids, kind='stable')
+    counts = np.bincount(ids, minlength=len(vocabulary))
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    return recipes[order], offsets, sizes
+
+
+def _pair_keys(postings, user_ids, recipe_count):
+    """
+    One key (row * recipe_count + position) per pantry ingredient found in a
+    recipe; a key repeats once for each ingredient the recipe shares
+    """
+    positions, offsets = postings[0], postings[1]
+    parts = [
+        positions[offsets[i]:offsets[i + 1]] + row * recipe_count
+        for row, ids in enumerate(user_ids)
+        for i in ids
+    ]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+
+class VectorScorer:
+    """
+    Whole-corpus scorer built from a RecipeIndex
+
+    Args:
+        index (RecipeIndex): Loaded recipe index to score against
+    """
+
+    def __init__(self, index):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for the vector scoring backend. Run: pip install numpy")
+
+        self.index = index
+        self.vocabulary = {ingredient: i for i, ingredient in enumerate(sorted(index.postings))}
+
+        self.mandatory_postings = _posting_arrays(index.mandatory, self.vocabulary)
+        self.optional_postings = _posting_arrays(index.optional, self.vocabulary)
+        self.either_postings = _posting_arrays(
+            [m | o for m, o in zip(index.mandatory, index.optional)], self.vocabulary
+        )
+
+        self.mandatory_sizes = self.mandatory_postings[2]
+        self.totals = self.mandatory_sizes + self.optional_postings[2]
+        self.always_makeable = np.flatnonzero(self.mandatory_sizes == 0)
+        self.types = np.array(index.types, dtype=object)
+
+    def _user_ids(self, user_set):
+        return [self.vocabulary[i] for i in user_set if i in self.vocabulary]
+
+    def _score(self, matched_mandatory, matched_optional, matched_total, mandatory_sizes, totals):
+        """
+        Scores from match counts, one entry per (pantry, recipe) pair
+
+        Returns:
+            tuple: (scores, can_make_now, overlap) arrays; scores are rounded
+                exactly like calculate_match_score
+        """
+        missing_mandatory = mandatory_sizes - matched_mandatory
+
+        # Same operations, in the same order, as the set-based scorer
+        with np.errstate(divide='ignore', invalid='ignore'):
+            coverage = (matched_total / totals) * 100
+        mandatory_bonus = np.where(missing_mandatory == 0, 50, -15 * missing_mandatory)
+        scores = coverage + mandatory_bonus + matched_optional * 5
+        scores = np.clip(scores, 0, 100)
+        scores[totals == 0] = 0
+
+        # np.round differs from round() only on (near) halfway cases, which
+        # are rare; round those in Python
+        tenths = scores * 10
+        rounded = np.round(scores, 1)
+        halfway = np.abs(tenths - np.floor(tenths) - 0.5) < 1e-6
+        if halfway.any():
+            rounded[halfway] = [round(float(score), 1) for score in scores[halfway]]
+
+        return rounded, missing_mandatory == 0, matched_total > 0
+
+    def _candidates(self, user_ids):
+        """
+        Match counts for the (pantry, recipe) pairs that can rank
+
+        A recipe can only rank for a pantry if they share an ingredient or the
+        recipe has no mandatory ingredients, so only those pairs are counted.
+
+        Returns:
+            tuple: (rows, positions, matched_mandatory, matched_optional,
+                matched_total) arrays, sorted by row and then position
+        """
+        recipe_count = len(self.index)
+        size = len(user_ids) * recipe_count
+
+        matched_total = np.bincount(_pair_keys(self.either_postings, user_ids, recipe_count), minlength=size)
+        candidate = matched_total > 0
+        candidate.reshape(len(user_ids), recipe_count)[:, self.always_makeable] = True
+        keys = np.flatnonzero(candidate)
+
+        matched_mandatory = np.bincount(_pair_keys(self.mandatory_postings, user_ids, recipe_count), minlength=size)
+        matched_optional = np.bincount(_pair_keys(self.optional_postings, user_ids, recipe_count), minlength=size)
+
+        return (
+            keys // recipe_count,
+            keys % recipe_count,
+            matched_mandatory[keys],
+            matched_optional[keys],
+            matched_total[keys]
+        )
+
+    def rank(self, user_set, dietary_filter=None, min_score=0, limit=None, can_make_now_only=False):
+        """
+        Rank recipes the same way find_matching_recipes does
+
+        Returns:
+            list: (position, match_info) pairs, best first
+        """
+        return self.rank_many([user_set], dietary_filter, min_score, limit, can_make_now_only)[0]
+
+    def rank_many(self, user_sets, dietary_filter=None, min_score=0, limit=None, can_make_now_only=False):
+        """
+        rank() for several ingredient sets, scored together
+
+        Each pantry ingredient contributes the posting array of its recipes,
+        offset into a (pantry, recipe) key; one bincount over those keys
+        counts the matches of every candidate pair of every set, and the
+        pairs are scored in the same operations.
+
+        Returns:
+            list: One list of (position, match_info) pairs per set, in order
+        """
+        user_sets = list(user_sets)
+        if limit is not None and limit <= 0:
+            return [[] for _ in user_sets]
+
+        # Candidate pairs per pass are bounded by pantries x recipes
+        step = max(1, MATRIX_BUDGET // max(1, len(self.index)))
+
+        rankings = []
+        for start in range(0, len(user_sets), step):
+            chunk = user_sets[start:start + step]
+
+            with timer('score'):
+                rows, positions, matched_mandatory, matched_optional, matched_total = self._candidates(
+                    [self._user_ids(user_set) for user_set in chunk]
+                )
+                scores, can_make_now, _ = self._score(
+                    matched_mandatory, matched_optional, matched_total,
+                    self.mandatory_sizes[positions], self.totals[positions]
+                )
+
+                keep = can_make_now.copy() if can_make_now_only else np.ones(len(positions), dtype=bool)
+                if dietary_filter:
+                    keep &= self.types[positions] == dietary_filter
+                keep &= scores >= min_score
+
+                rows, positions = rows[keep], positions[keep]
+                # Scores are multiples of 0.1 in [0, 100], so this key orders
+                # exactly like (can_make_now, score)
+                keys = can_make_now[keep] * 1000.0 + scores[keep]
+                bounds = np.searchsorted(rows, np.arange(len(chunk) + 1))
+
+            for row, user_set in enumerate(chunk):
+                segment = slice(bounds[row], bounds[row + 1])
+                rankings.append(self._ordered(user_set, positions[segment], keys[segment], limit))
+
+        return rankings
+
+    def _ordered(self, user_set, positions, keys, limit):
+        """The best `limit` positions by key, ties in corpus order, with match_info"""
+        if limit is not None and limit < len(positions):
+            cutoff = np.partition(keys, len(keys) - limit)[len(keys) - limit]
+            above = np.flatnonzero(keys > cutoff)
+            ties = np.flatnonzero(keys == cutoff)[:limit - len(above)]
+            selected = np.concatenate((above, ties))
+            positions, keys = positions[selected], keys[selected]
+
+        with timer('sort'):
+            order = np.lexsort((positions, -keys))
+        return [
+            (int(position), self.index.match(int(position), user_set))
+            for position in positions[order]
+        ]
+
+
+_scorers = weakref.WeakKeyDictionary()
+_scorers_lock = threading.Lock()
+
+
+def get_vector_scorer(index):
+    """Return the VectorScorer for `index`, building it on first use"""
+    with _scorers_lock:
+        scorer = _scorers.get(index)
+        if scorer is None:
+            scorer = _scorers[index] = VectorScorer(index)
+    return scorer
@@ -0,0 +1,165 @@
+"""
+Concurrent search orchestration
+
+Starts database matching and AI generation at the same time, so a search
+waits for the slower of the two instead of their sum. Each half has its own
+thread pool: generations waiting on the model (or for a model slot, see
+utils.ai_helper) never hold up another search's database matching.
+Database results can be shown as soon as they are ready; AI recipes are
+handed over one by one as they are generated, or dropped once a deadline
+has passed.
+"""
+
+import contextvars
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.matcher import find_matching_recipes
+from utils.ai_helper import generate_ai_recipes, stream_ai_recipes
+
+logger = logging.getLogger(__name__)
+
+# Seconds after the search starts before AI recipes are given up on
+AI_DEADLINE = 30.0
+
+SEARCH_WORKERS = 8
+AI_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix='dishgpt-search')
+_ai_executor = ThreadPoolExecutor(max_workers=AI_WORKERS, thread_name_prefix='dishgpt-ai')
+
+# Marks the end of the AI recipe queue
+_AI_DONE = object()
+
+
+def _produce_ai_recipes(recipes, ai_queue):
+    """Push AI recipes onto the queue as they are produced, then the end marker"""
+    try:
+        for recipe in recipes():
+            ai_queue.put(recipe)
+    except Exception:
+        logger.exception("AI generation error")
+    finally:
+        ai_queue.put(_AI_DONE)
+
+
+class SearchJob:
+    """
+    A running search: database matching and (optionally) AI generation
+
+    Attributes:
+        started_at (float): time.monotonic() when the search started
+        ai_deadline (float): Seconds after start to wait for AI recipes
+        ai_timed_out (bool): True once AI recipes were dropped for being late
+    """
+
+    def __init__(self, db_future, ai_queue=None, ai_deadline=AI_DEADLINE, started_at=None):
+        self.db_future = db_future
+        self.ai_queue = ai_queue
+        self.ai_deadline = ai_deadline
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.ai_timed_out = False
+        self._ai_recipes = []
+        self._ai_finished = ai_queue is None
+
+    def database_results(self, timeout=None):
+        """Wait for and return the database recipes"""
+        return self.db_future.result(timeout=timeout)
+
+    def ai_pending(self):
+        """True while AI recipes may still arrive"""
+        return not self._ai_finished
+
+    def iter_ai_results(self):
+        """
+        Yield AI recipes as they arrive, until generation ends or the deadline
+
+        A late generation keeps running in the background, so its result
+        still lands in the AI cache.
+        """
+        while not self._ai_finished:
+            remaining = self.ai_deadline - (time.monotonic() - self.started_at)
+            try:
+                recipe = self.ai_queue.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                self.ai_timed_out = True
+                self._ai_finished = True
+                return
+
+            if recipe is _AI_DONE:
+                self._ai_finished = True
+                return
+
+            self._ai_recipes.append(recipe)
+            yield recipe
+
+    def ai_results(self):
+        """
+        Wait for the AI recipes until the deadline
+
+        Returns:
+            list: AI recipes received so far, or [] if AI is off or failed
+        """
+        for _ in self.iter_ai_results():
+            pass
+        return list(self._ai_recipes)
+
+
+def _session_results(session, user_ingredients):
+    """Move a MatchSession to the new pantry and return its ranking"""
+    session.set_ingredients(user_ingredients)
+    return session.recipes()
+
+
+def start_search(user_ingredients, dietary_filter=None, use_ai=True, num_ai_recipes=2,
+                 ai_deadline=AI_DEADLINE, stream_ai=True, session=None, **match_options):
+    """
+    Start database matching and AI generation concurrently
+
+    Args:
+        user_ingredients (list): Normalized ingredients the user has
+        dietary_filter (str): 'veg' or 'non-veg' or None
+        use_ai (bool): Also generate recipes with Gemini
+        num_ai_recipes (int): Number of AI recipes to ask for
+        ai_deadline (float): Seconds to wait for AI recipes before dropping them
+        stream_ai (bool): Hand over each AI recipe as soon as it is generated
+            (stream_ai_recipes) rather than all at once (generate_ai_recipes)
+        session (MatchSession): Rank database recipes by updating this
+            session (see utils.session) instead of matching from scratch;
+            its own filters apply and match_options are ignored
+        **match_options: Extra keyword arguments for find_matching_recipes
+
+    Returns:
+        SearchJob: Handle to collect the results from
+    """
+    started_at = time.monotonic()
+
+    # Pool threads run in a copy of the caller's context, so an active
+    # utils.metrics trace also records their work
+    context = contextvars.copy_context()
+
+    ai_queue = None
+    if use_ai:
+        ai_options = {
+            'user_ingredients': user_ingredients,
+            'dietary_filter': dietary_filter,
+            'num_recipes': num_ai_recipes
+        }
+        generate = stream_ai_recipes if stream_ai else generate_ai_recipes
+
+        ai_queue = queue.Queue()
+        _ai_executor.submit(context.copy().run, _produce_ai_recipes, lambda: generate(**ai_options), ai_queue)
+
+    if session is not None:
+        db_future = _executor.submit(context.copy().run, _session_results, session, user_ingredients)
+    else:
+        db_future = _executor.submit(
+            context.copy().run,
+            find_matching_recipes,
+            user_ingredients=user_ingredients,
+            dietary_filter=dietary_filter,
+            **match_options
+        )
+
+    return SearchJob(db_future, ai_queue, ai_deadline, started_at)
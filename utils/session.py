@@ -0,0 +1,228 @@
+"""
+Incremental matching for a pantry refined one ingredient at a time
+
+A MatchSession keeps, for every recipe sharing an ingredient with the
+current pantry, how many of its ingredients (all, mandatory, optional) the
+pantry covers, plus the ranked list of the recipes that pass the filters.
+Adding or removing an ingredient only revisits the recipes in that
+ingredient's posting list: their counts change by one, their score is
+recomputed from the counts, and each moves within the ranked list by
+binary search. Results are exactly what find_matching_recipes returns for
+the same pantry.
+
+    session = MatchSession(['chicken', 'rice'], dietary_filter='non-veg')
+    session.add('onion')
+    session.remove('rice')
+    session.recipes(limit=10)
+"""
+
+import bisect
+import threading
+from utils import matcher
+from utils.metrics import timer
+from utils.normalizer import normalize_ingredient, normalize_ingredient_list
+from utils.records import as_dict
+
+
+class MatchSession:
+    """
+    Ranked matches for one user's pantry, updated ingredient by ingredient
+
+    Args:
+        ingredients (list or str): Starting pantry
+        dietary_filter, min_score, can_make_now_only, fuzzy: As for
+            find_matching_recipes
+        index (RecipeIndex): Recipes to match; defaults to the process-wide
+            index, and the session follows it when it is replaced (e.g. by a
+            hot reload)
+    """
+
+    def __init__(self, ingredients=(), dietary_filter=None, min_score=0, can_make_now_only=False,
+                 fuzzy=True, index=None):
+        self.dietary_filter = dietary_filter
+        self.min_score = min_score
+        self.can_make_now_only = can_make_now_only
+        self.fuzzy = fuzzy
+        self._follow_index = index is None
+        self._lock = threading.RLock()
+        self._pantry = {}
+        self._reset(index if index is not None else matcher.get_recipe_index())
+        self.set_ingredients(ingredients)
+
+    def _reset(self, index):
+        """Start over on `index` with an empty pantry"""
+        self.index = index
+        self._pantry.clear()
+        # position -> [matched, matched mandatory, matched optional]
+        self._counts = {}
+        # position -> its key in _ranked; keys sort best first
+        self._keys = {}
+        self._ranked = []
+        for position in index.always_makeable:
+            self._rerank(position)
+
+    def _sync_index(self):
+        """Rebuild on the current process-wide index if it was replaced"""
+        if self._follow_index:
+            index = matcher.get_recipe_index()
+            if index is not self.index:
+                pantry = list(self._pantry)
+                self._reset(index)
+                for ingredient in pantry:
+                    self._add(ingredient)
+
+    def _resolve(self, ingredient):
+        ingredient = normalize_ingredient(ingredient)
+        if ingredient and self.fuzzy:
+            ingredient = matcher.get_ingredient_resolver().resolve(ingredient)[0]
+        return ingredient
+
+    @property
+    def ingredients(self):
+        """The pantry, normalized, in the order ingredients were added"""
+        return list(self._pantry)
+
+    def __len__(self):
+        """Number of ranked recipes"""
+        with self._lock:
+            self._sync_index()
+            return len(self._ranked)
+
+    def add(self, ingredient):
+        """
+        Add one ingredient to the pantry
+
+        Returns:
+            bool: False if it was already there
+        """
+        with self._lock:
+            self._sync_index()
+            ingredient = self._resolve(ingredient)
+            if not ingredient or ingredient in self._pantry:
+                return False
+            with timer('session_update'):
+                self._add(ingredient)
+            return True
+
+    def remove(self, ingredient):
+        """
+        Remove one ingredient from the pantry
+
+        Returns:
+            bool: False if it wasn't there
+        """
+        with self._lock:
+            self._sync_index()
+            ingredient = self._resolve(ingredient)
+            if ingredient not in self._pantry:
+                return False
+            with timer('session_update'):
+                self._remove(ingredient)
+            return True
+
+    def set_ingredients(self, ingredients):
+        """
+        Replace the pantry, adding and removing only what differs
+
+        Args:
+            ingredients (list or str): The new pantry
+        """
+        with self._lock:
+            self._sync_index()
+            wanted = normalize_ingredient_list(ingredients)
+            if self.fuzzy:
+                wanted = matcher.get_ingredient_resolver().resolve_list(wanted)
+            wanted = dict.fromkeys(wanted)
+            with timer('session_update'):
+                for ingredient in [i for i in self._pantry if i not in wanted]:
+                    self._remove(ingredient)
+                for ingredient in wanted:
+                    if ingredient not in self._pantry:
+                        self._add(ingredient)
+
+    def _add(self, ingredient):
+        self._pantry[ingredient] = None
+        self._update(ingredient, 1)
+
+    def _remove(self, ingredient):
+        del self._pantry[ingredient]
+        self._update(ingredient, -1)
+
+    def _update(self, ingredient, step):
+        """Move the counts of every recipe containing `ingredient` by `step`"""
+        index = self.index
+        types = index.types
+        for position in index.postings.get(ingredient, ()):
+            if self.dietary_filter and types[position] != self.dietary_filter:
+                continue
+
+            counts = self._counts.get(position)
+            if counts is None:
+                counts = self._counts[position] = [0, 0, 0]
+            counts[0] += step
+            if ingredient in index.mandatory[position]:
+                counts[1] += step
+            if ingredient in index.optional[position]:
+                counts[2] += step
+            if not counts[0]:
+                del self._counts[position]
+
+            self._rerank(position)
+
+    def _rerank(self, position):
+        """Put `position` where its current counts rank it, or drop it"""
+        old = self._keys.pop(position, None)
+        if old is not None:
+            del self._ranked[bisect.bisect_left(self._ranked, old)]
+
+        key = self._key(position)
+        if key is not None:
+            self._keys[position] = key
+            bisect.insort(self._ranked, key)
+
+    def _key(self, position):
+        """Sort key of a ranked recipe, or None if it doesn't rank"""
+        index = self.index
+        if self.dietary_filter and index.types[position] != self.dietary_filter:
+            return None
+
+        matched, matched_mandatory, matched_optional = self._counts.get(position, (0, 0, 0))
+        mandatory = len(index.mandatory[position])
+        if not matched and mandatory:
+            return None
+
+        can_make_now = matched_mandatory == mandatory
+        if self.can_make_now_only and not can_make_now:
+            return None
+
+        score = matcher._score_counts(
+            mandatory + len(index.optional[position]), mandatory - matched_mandatory,
+            matched, matched_optional
+        )
+        if score < self.min_score:
+            return None
+
+        # Ready-to-cook first, then by score; ties keep corpus order
+        return (not can_make_now, -score, position)
+
+    def match_recipes(self, limit=None):
+        """
+        The current ranking
+
+        Args:
+            limit (int): Return only the best `limit` recipes (None for all)
+
+        Returns:
+            list: (Recipe, MatchInfo) pairs, best first, as
+                utils.matcher.match_recipes returns them
+        """
+        with self._lock:
+            self._sync_index()
+            index = self.index
+            user_set = set(self._pantry)
+            ranked = self._ranked if limit is None else self._ranked[:limit]
+            return [(index.recipes[key[2]], index.match(key[2], user_set)) for key in ranked]
+
+    def recipes(self, limit=None):
+        """The current ranking as find_matching_recipes returns it"""
+        return [as_dict(recipe, match_info) for recipe, match_info in self.match_recipes(limit)]
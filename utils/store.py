@@ -0,0 +1,265 @@
+"""
+Compact binary recipe store
+
+recipes.json is compiled once into a single file holding what matching
+needs as flat arrays (normalized ingredient ids per recipe, type codes)
+plus every recipe's full JSON body in a separate blob. The file is opened
+with mmap, so opening is near-instant, worker processes share its pages
+through the OS page cache, and a recipe body is only decoded when that
+recipe is actually returned.
+
+Layout (little-endian): a header with the recipe count, vocabulary size
+and a table of (offset, length) sections, followed by the sections:
+
+    vocabulary offsets (u32) + vocabulary blob (UTF-8 normalized names)
+    mandatory offsets (u32) + mandatory ingredient ids (u32)
+    optional offsets (u32) + optional ingredient ids (u32)
+    type codes (u8) + type names (JSON list)
+    body offsets (u64) + body blob (one compact JSON object per recipe)
+    per-recipe substitutes, merged into one normalized lookup (JSON)
+    per-recipe substitutes blocks, by position (JSON)
+
+Usage:
+    python -m utils.store data/recipes.json data/recipes.bin
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from utils.normalizer import normalize_ingredient
+
+STORE_PATH = 'data/recipes.bin'
+
+MAGIC = b'DGRS'
+FORMAT_VERSION = 3
+
+SECTIONS = (
+    'vocabulary_offsets', 'vocabulary',
+    'mandatory_offsets', 'mandatory_ids',
+    'optional_offsets', 'optional_ids',
+    'types', 'type_names',
+    'body_offsets', 'bodies',
+    'substitutes', 'substitute_blocks'
+)
+
+# magic, version, recipe count, vocabulary size, then (offset, length) per section
+HEADER = struct.Struct('<4sIII' + 'QQ' * len(SECTIONS))
+
+# Sections start on 8-byte boundaries so they can be viewed as u32 / u64 arrays
+ALIGNMENT = 8
+
+
+def _ids(ingredients, vocabulary):
+    # Recipe order, so the index builds its sets exactly as from the JSON
+    return list(dict.fromkeys(vocabulary[normalize_ingredient(i['name'])] for i in ingredients))
+
+
+def build_store(recipes, path=STORE_PATH):
+    """
+    Compile recipes into a binary store file
+
+    The file is written next to `path` and renamed into place, so readers
+    never see a partial store.
+
+    Args:
+        recipes (list): Recipe dictionaries, as in recipes.json
+        path (str): Store file to write
+    """
+    names = set()
+    for recipe in recipes:
+        for kind in ('mandatory', 'optional'):
+            names.update(normalize_ingredient(i['name']) for i in recipe['ingredients'].get(kind, []))
+    names = sorted(names)
+    vocabulary = {name: i for i, name in enumerate(names)}
+
+    encoded_names = [name.encode('utf-8') for name in names]
+    vocabulary_offsets = array('I', [0])
+    for name in encoded_names:
+        vocabulary_offsets.append(vocabulary_offsets[-1] + len(name))
+
+    id_sections = []
+    for kind in ('mandatory', 'optional'):
+        offsets = array('I', [0])
+        ids = array('I')
+        for recipe in recipes:
+            ids.extend(_ids(recipe['ingredients'].get(kind, []), vocabulary))
+            offsets.append(len(ids))
+        id_sections.extend([offsets, ids])
+
+    type_names = sorted({recipe.get('type') for recipe in recipes}, key=str)
+    type_codes = {name: code for code, name in enumerate(type_names)}
+    types = array('B', (type_codes[recipe.get('type')] for recipe in recipes))
+
+    bodies = [json.dumps(recipe, ensure_ascii=False, separators=(',', ':')).encode('utf-8') for recipe in recipes]
+
+    # Merged here so the substitute lookup never has to decode every body
+    from utils.matcher import build_substitute_lookup
+    substitutes = json.dumps(build_substitute_lookup({}, recipes), ensure_ascii=False).encode('utf-8')
+    substitute_blocks = json.dumps(
+        {position: recipe['substitutes'] for position, recipe in enumerate(recipes) if recipe.get('substitutes')},
+        ensure_ascii=False
+    ).encode('utf-8')
+    body_offsets = array('Q', [0])
+    for body in bodies:
+        body_offsets.append(body_offsets[-1] + len(body))
+
+    sections = [
+        vocabulary_offsets, b''.join(encoded_names),
+        *id_sections,
+        types, json.dumps(type_names).encode('utf-8'),
+        body_offsets, b''.join(bodies),
+        substitutes, substitute_blocks
+    ]
+    if sys.byteorder != 'little':
+        for section in sections:
+            if isinstance(section, array):
+                section.byteswap()
+    sections = [section.tobytes() if isinstance(section, array) else section for section in sections]
+
+    table = []
+    position = HEADER.size
+    for section in sections:
+        position += -position % ALIGNMENT
+        table.extend([position, len(section)])
+        position += len(section)
+
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(recipes), len(names), *table))
+        for section, offset in zip(sections, table[::2]):
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(section)
+    os.replace(temporary, path)
+
+
+def _array_view(view, typecode):
+    """A u32 / u64 view of little-endian section bytes"""
+    if sys.byteorder == 'little':
+        return view.cast(typecode)
+    values = array(typecode, view.tobytes())
+    values.byteswap()
+    return values
+
+
+class RecipeBodies(Sequence):
+    """Read-only list of recipes, decoded from the store on access"""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError('recipe position out of range')
+        return json.loads(bytes(self._blob[self._offsets[position]:self._offsets[position + 1]]))
+
+
+class RecipeStore:
+    """
+    Memory-mapped view of a compiled recipe store
+
+    Attributes:
+        vocabulary (list): Normalized ingredient names, indexed by id
+        types (list): Recipe 'type' per position
+        recipes (RecipeBodies): Full recipes, decoded on access
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(self._mmap)
+        if len(view) < HEADER.size:
+            raise ValueError(f"{path} is not a recipe store")
+        magic, version, recipe_count, vocabulary_size, *table = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a recipe store")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has store format {version}, expected {FORMAT_VERSION}; rebuild it")
+
+        sections = {
+            name: view[offset:offset + length]
+            for name, offset, length in zip(SECTIONS, table[::2], table[1::2])
+        }
+
+        vocabulary_offsets = _array_view(sections['vocabulary_offsets'], 'I')
+        blob = sections['vocabulary']
+        self.vocabulary = [
+            sys.intern(str(blob[vocabulary_offsets[i]:vocabulary_offsets[i + 1]], 'utf-8'))
+            for i in range(vocabulary_size)
+        ]
+
+        self._mandatory = (_array_view(sections['mandatory_offsets'], 'I'),
+                           _array_view(sections['mandatory_ids'], 'I'))
+        self._optional = (_array_view(sections['optional_offsets'], 'I'),
+                          _array_view(sections['optional_ids'], 'I'))
+
+        type_names = json.loads(bytes(sections['type_names']))
+        self.types = [type_names[code] for code in sections['types']]
+
+        self.recipes = RecipeBodies(_array_view(sections['body_offsets'], 'Q'), sections['bodies'])
+        self._substitutes = sections['substitutes']
+        self._substitute_blocks = sections['substitute_blocks']
+        self._recipe_count = recipe_count
+
+    def __len__(self):
+        return self._recipe_count
+
+    def _sets(self, rows):
+        offsets, ids = rows
+        names = list(map(self.vocabulary.__getitem__, ids))
+        offsets = offsets.tolist()
+        return (frozenset(names[offsets[p]:offsets[p + 1]]) for p in range(self._recipe_count))
+
+    def ingredient_sets(self):
+        """Yield the normalized (mandatory, optional) ingredient sets of every recipe"""
+        return zip(self._sets(self._mandatory), self._sets(self._optional))
+
+    def recipe_substitutes(self):
+        """Every recipe's 'substitutes' block, merged as build_substitute_lookup does"""
+        return json.loads(bytes(self._substitutes))
+
+    def substitute_blocks(self):
+        """Position -> that recipe's 'substitutes' block, for the recipes that have one"""
+        return {int(position): block for position, block in json.loads(bytes(self._substitute_blocks)).items()}
+
+
+def is_stale(store_path=STORE_PATH, source_path='data/recipes.json'):
+    """True if the store is missing or older than the JSON it was built from"""
+    try:
+        store_mtime = os.stat(store_path).st_mtime_ns
+    except OSError:
+        return True
+    try:
+        return store_mtime < os.stat(source_path).st_mtime_ns
+    except OSError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile recipes.json into a binary recipe store')
+    parser.add_argument('source', nargs='?', default='data/recipes.json')
+    parser.add_argument('output', nargs='?', default=STORE_PATH)
+    args = parser.parse_args()
+
+    with open(args.source, 'r', encoding='utf-8') as f:
+        recipes = json.load(f).get('recipes', [])
+    build_store(recipes, args.output)
+    print(f"Wrote {len(recipes)} recipes to {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Substitute-aware matching
+
+With use_substitutes=True, find_matching_recipes counts a recipe
+ingredient as available when the user has one of its substitutes: tofu
+covers chicken if substitutes.json (or the recipe's own 'substitutes'
+block) lists tofu for chicken. Substituted ingredients score exactly like
+ingredients the user has, and MatchInfo.substitutions reports which
+substitute stood in for which ingredient.
+
+Substitutes are inverted once into a reverse index (pantry ingredient ->
+ingredients it can stand in for): one global index from substitutes.json,
+plus a small one per recipe that has its own block. A query unions the
+entries of its pantry ingredients, so each recipe costs a couple of set
+intersections however many substitutes exist.
+"""
+
+import threading
+import weakref
+from utils.normalizer import normalize_ingredient
+
+
+def _normalized_options(substitutes):
+    """Ingredient -> substitutes, all normalized, preference order kept, self-references dropped"""
+    options = {}
+    for ingredient, subs in substitutes.items():
+        key = normalize_ingredient(ingredient)
+        if not key:
+            continue
+        merged = options.setdefault(key, [])
+        for sub in subs:
+            sub = normalize_ingredient(sub)
+            if sub and sub != key and sub not in merged:
+                merged.append(sub)
+    return {key: tuple(subs) for key, subs in options.items() if subs}
+
+
+def _reverse(options):
+    """Substitute -> frozenset of the ingredients it can replace"""
+    replaces = {}
+    for ingredient, subs in options.items():
+        for sub in subs:
+            replaces.setdefault(sub, set()).add(ingredient)
+    return {sub: frozenset(ingredients) for sub, ingredients in replaces.items()}
+
+
+class SubstitutionGraph:
+    """
+    Reverse substitute index over a RecipeIndex
+
+    Args:
+        index (RecipeIndex): Recipes, whose 'substitutes' blocks apply to
+            that recipe only
+        substitutes (dict): Global ingredient -> substitutes mapping
+        version: Identifies the substitute data the graph was built from
+    """
+
+    def __init__(self, index, substitutes, version=None):
+        self.index = index
+        self.version = version
+
+        self.options = _normalized_options(substitutes)
+        self.replaces = _reverse(self.options)
+
+        # Per-recipe blocks, only for the recipes that have one
+        self.local_options = {}
+        self.local_replaces = {}
+        self.local_postings = {}
+        for position, block in index.substitute_blocks().items():
+            options = _normalized_options(block)
+            if not options:
+                continue
+            self.local_options[position] = options
+            self.local_replaces[position] = _reverse(options)
+            for sub in self.local_replaces[position]:
+                self.local_postings.setdefault(sub, []).append(position)
+
+    def coverable(self, user_set):
+        """Ingredients the user lacks but can cover with a global substitute"""
+        covered = set()
+        for ingredient in user_set:
+            covered |= self.replaces.get(ingredient, frozenset())
+        return covered - user_set
+
+    def candidates(self, user_set, coverable):
+        """Positions of recipes worth scoring, counting substitutes"""
+        positions = set(self.index.candidates(user_set | coverable))
+        for ingredient in user_set:
+            positions.update(self.local_postings.get(ingredient, ()))
+        return sorted(positions)
+
+    def match(self, position, user_set, coverable):
+        """
+        Score a recipe counting substitutes
+
+        Returns:
+            MatchInfo: With 'substitutions' as (ingredient, substitute) pairs
+        """
+        index = self.index
+        covered = coverable & (index.mandatory[position] | index.optional[position])
+
+        local = self.local_replaces.get(position)
+        if local:
+            for ingredient in user_set:
+                replaced = local.get(ingredient)
+                if replaced:
+                    covered |= replaced
+            covered -= user_set
+
+        if not covered:
+            match_info = index.match(position, user_set)
+            match_info.substitutions = ()
+            return match_info
+
+        match_info = index.match(position, user_set | covered)
+        match_info.substitutions = tuple(
+            (ingredient, self._substitute_for(position, ingredient, user_set))
+            for ingredient in sorted(covered)
+        )
+        return match_info
+
+    def _substitute_for(self, position, ingredient, user_set):
+        """The preferred substitute the user has; the recipe's own block comes first"""
+        local = self.local_options.get(position, {}).get(ingredient, ())
+        for sub in local + self.options.get(ingredient, ()):
+            if sub in user_set:
+                return sub
+        return None
+
+
+_graphs = weakref.WeakKeyDictionary()
+_graphs_lock = threading.Lock()
+
+
+def get_substitution_graph(index, store):
+    """
+    Return the SubstitutionGraph for `index`, rebuilt when the global
+    substitutes in `store` (a SubstituteStore) change
+    """
+    substitutes, version = store.global_substitutes()
+    with _graphs_lock:
+        graph = _graphs.get(index)
+        if graph is None or graph.version != version:
+            graph = _graphs[index] = SubstitutionGraph(index, substitutes, version)
+    return graph
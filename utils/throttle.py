@@ -0,0 +1,234 @@
+"""
+Coalescing and limits for calls to a shared, metered backend
+
+SingleFlight lets concurrent callers asking for the same thing share one
+call: the first caller for a key runs it (the leader), the others follow
+the leader's flight and receive what it produces. A follower whose leader
+stops before finishing, or goes quiet for too long, is told so
+(FlightAbandoned) and can run again: the first to do so leads a new
+flight and the others follow it, so a failed leader costs one more call,
+not one per follower. RateLimiter (a token
+bucket) and ConcurrencyLimiter (a semaphore with a timeout) bound how
+fast and how many calls reach the backend, so a burst waits a bounded
+time for capacity instead of exceeding the quota.
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket: `rate` calls per second on average, bursts of up to `burst`
+
+    Args:
+        rate (float): Tokens added per second (0 or less disables limiting)
+        burst (int): Bucket size
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available; otherwise seconds until the next one"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        """
+        Wait for a token
+
+        Returns:
+            bool: False if none became available within `timeout` seconds
+        """
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < wait:
+                    return False
+            time.sleep(wait)
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` callers at once
+
+    Args:
+        limit (int): Concurrent callers allowed (0 or less for no limit)
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit) if limit > 0 else None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def acquire(self, timeout=None):
+        """
+        Wait for a slot
+
+        Returns:
+            bool: False if none became free within `timeout` seconds
+        """
+        if self._semaphore is not None and not self._semaphore.acquire(timeout=timeout):
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        """Free a slot taken with acquire"""
+        with self._lock:
+            self.in_flight -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+
+class FlightAbandoned(Exception):
+    """The leader stopped before finishing, or published nothing for too long"""
+
+
+class Flight:
+    """
+    One in-flight call, shared by its leader and followers
+
+    The leader publishes items as it produces them and lands the flight when
+    done, as complete only if it produced everything; follow() yields every
+    item published, waiting for more until it lands.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.landed = False
+        self.complete = False
+        self.followers = 0
+        self._condition = threading.Condition()
+
+    def publish(self, item):
+        with self._condition:
+            self.items.append(item)
+            self._condition.notify_all()
+
+    def land(self, complete=True):
+        with self._condition:
+            self.landed = True
+            self.complete = complete
+            self._condition.notify_all()
+
+    def follow(self, timeout=None):
+        """
+        Yield the items as they are published, until the flight lands
+
+        Raises:
+            FlightAbandoned: After the items published so far, if the flight
+                landed incomplete or no item came for `timeout` seconds
+        """
+        position = 0
+        while True:
+            with self._condition:
+                if not self._condition.wait_for(
+                    lambda: position < len(self.items) or self.landed, timeout=timeout
+                ):
+                    raise FlightAbandoned(f"No result for {timeout} seconds")
+                if position == len(self.items):
+                    if not self.complete:
+                        raise FlightAbandoned("The leader stopped before finishing")
+                    return
+                item = self.items[position]
+            position += 1
+            yield item
+
+
+class SingleFlight:
+    """Table of the flights in progress, by key"""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def join(self, key):
+        """
+        Join the flight for `key`, starting one if there is none
+
+        Returns:
+            tuple: (flight, leader); the leader must call land() when done
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def land(self, key, flight, complete=True):
+        """End the leader's flight; later callers for `key` start a new one"""
+        self._drop(key, flight)
+        flight.land(complete)
+
+    def _drop(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def run(self, key, produce, timeout=None, share=None, on_follow=None):
+        """
+        Yield what produce() yields, calling it once for concurrent callers
+
+        The first caller for `key` runs produce() and publishes each item;
+        callers arriving meanwhile receive the published items instead.
+
+        Args:
+            key: What makes two calls the same
+            produce (callable): Returns an iterator of items
+            timeout (float): Seconds a follower waits for the next item
+            share (callable): Copies an item, for the flight and for each
+                follower (default: items are shared as they are)
+            on_follow (callable): Called when the caller joins as a follower
+
+        Raises:
+            FlightAbandoned: In a follower, after the items received, if the
+                leader stopped early or went quiet for `timeout` seconds. A
+                stalled flight is dropped, so calling run() again joins or
+                leads a fresh one.
+        """
+        share = share or (lambda item: item)
+        flight, leader = self.join(key)
+        if not leader:
+            if on_follow is not None:
+                on_follow()
+            try:
+                for item in flight.follow(timeout):
+                    yield share(item)
+            except FlightAbandoned:
+                self._drop(key, flight)
+                raise
+            return
+
+        finished = False
+        try:
+            for item in produce():
+                flight.publish(share(item))
+                yield item
+            finished = True
+        finally:
+            self.land(key, flight, complete=finished)
+
+    def __len__(self):
+        return len(self._flights)